@@ -1,29 +1,40 @@
-from fastapi import FastAPI, HTTPException, Body, Request
+from fastapi import FastAPI, HTTPException, Body, Request, Depends
 from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
-import logging, io, time, sqlite3, threading
+import logging, time, threading, hashlib, hmac, asyncio
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from datetime import datetime
 from typing import List
 
 import os
-import pandas as pd
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
 from langchain_openai import ChatOpenAI
+from openai import DefaultHttpxClient, DefaultAsyncHttpxClient
 from langchain_google_genai import GoogleGenerativeAI, ChatGoogleGenerativeAI
 from langchain_anthropic import ChatAnthropic
 from langchain_nvidia_ai_endpoints import ChatNVIDIA
 from langchain_mistralai.chat_models import ChatMistralAI
 from langchain_groq import ChatGroq
 
-from src.prompt import query_uniprot, generate_solr_query
-from src.promptForRag import answerWithProteins
+from src.prompt import query_uniprot, agenerate_solr_query
+from src.promptForRag import aanswerWithProteins
+from src.llmResponseCache import cacheStats
+from src.solrQueryValidator import repairSolrQuery
+from src.promptFieldSelector import SLIM_PROMPT
+from src.promptSchemaCache import getPromptSchema
+from src.requestTrace import TraceLogHandler, startTrace, endTrace, span, runInExecutor
+from src.solrTranslationCache import lookupTranslation, storeTranslation, markStale, translationStats
 from src.relevantGOIdFinder import findRelatedGoIds
 from src.relevantProteinFinder import searchSpecificEmbedding
 from src.prott5Embedder import load_t5, getEmbeddings
 from src.proteinRetriverFromFlatFiles import load_vectorstore
 from src.proteinRetriverFromBM25 import bm25_initialize
+from src.proteinMetadataStore import getMetadataStore, lookupProteinInfo
+from src.sqlitePool import poolStats
+from src.flatFileContentCache import contentCacheStats, warmContentCache
 
 from configModels import get_provider_for_model_name
 
@@ -36,10 +47,20 @@ app.add_middleware(
 
 sqliteDb = "asset/protein_index2.db"
 
-# set up in-memory log capture
-log_stream = io.StringIO()
+# LLM-bound endpoints are async; blocking work runs on these pools so a slow
+# provider never holds a server thread. Retrieval/embedding is CPU-bound and
+# gets its own small pool, UniProt calls are network-bound.
+retrieval_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RETRIEVAL_WORKERS", "4")), thread_name_prefix="retrieval"
+)
+uniprot_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("UNIPROT_WORKERS", "16")), thread_name_prefix="uniprot"
+)
+
+# log records are captured per request (see src/requestTrace.py), so
+# concurrent requests never see or wipe each other's logs
 logging.basicConfig(
-    stream=log_stream,
+    handlers=[TraceLogHandler()],
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s",
 )
@@ -109,7 +130,45 @@ def _enforce_embedded_openai_rate(client_id: str):
         _embedded_openai_usage[client_id] = history
 
 
-def build_llm(model_name: str, api_key: str | None, temperature: float | None, chat_mode: bool = False, client_id: str | None = None):
+# Constructed clients keep their HTTP connection pool, so reusing them across
+# requests avoids a new TCP+TLS handshake to the provider on every call.
+LLM_POOL_SIZE = 32
+LLM_POOL_IDLE_SECONDS = 600
+# clients dropped from the pool (idle or least recently used) are closed only
+# after this long, since a request that took one just before may still use it
+LLM_POOL_CLOSE_GRACE_SECONDS = 300
+_llm_pool: "OrderedDict[tuple, tuple[object, float]]" = OrderedDict()
+_llm_retired: "list[tuple[object, float]]" = []
+_llm_pool_lock = threading.Lock()
+_llm_closing: set = set()
+
+
+def _retire_llms(keys, now):
+    # callers hold _llm_pool_lock; returns the retired clients due for closing
+    for key in keys:
+        _llm_retired.append((_llm_pool.pop(key)[0], now))
+    due = [llm for llm, retired in _llm_retired if now - retired >= LLM_POOL_CLOSE_GRACE_SECONDS]
+    _llm_retired[:] = [(llm, retired) for llm, retired in _llm_retired if now - retired < LLM_POOL_CLOSE_GRACE_SECONDS]
+    return due
+
+
+def _close_llm(llm):
+    """Close the HTTP clients _construct_llm gave an LLM client, if any."""
+    client = getattr(llm, "http_client", None)
+    if client is not None:
+        client.close()
+    async_client = getattr(llm, "http_async_client", None)
+    if async_client is not None:
+        try:
+            task = asyncio.get_running_loop().create_task(async_client.aclose())
+        except RuntimeError:
+            asyncio.run(async_client.aclose())
+        else:
+            _llm_closing.add(task)
+            task.add_done_callback(_llm_closing.discard)
+
+
+def build_llm(model_name: str, api_key: str | None, temperature: float | None, chat_mode: bool = False, client_id: str | None = None, enforce_rate: bool = True):
     provider = get_provider_for_model_name(model_name)
     if not provider:
         raise ValueError(f"Unsupported model {model_name}: no provider found")
@@ -122,7 +181,8 @@ def build_llm(model_name: str, api_key: str | None, temperature: float | None, c
                 raise ValueError(
                     f"Stored key is only available for model '{OPENAI_EMBEDDED_MODEL}'."
                 )
-            _enforce_embedded_openai_rate(client_id or "anonymous")
+            if enforce_rate:
+                _enforce_embedded_openai_rate(client_id or "anonymous")
         env_var = PROVIDER_ENV_VARS.get(provider)
         if env_var:
             api_key = os.getenv(env_var)
@@ -136,8 +196,51 @@ def build_llm(model_name: str, api_key: str | None, temperature: float | None, c
     if temperature is not None and model_name not in NO_TEMP_MODELS:
         kwargs["temperature"] = temperature
 
+    key = (
+        provider,
+        model_name,
+        kwargs.get("temperature"),
+        chat_mode,
+        hashlib.sha256(api_key.encode("utf-8")).hexdigest(),
+    )
+    now = time.time()
+    with _llm_pool_lock:
+        stale = [k for k, (_, last_used) in _llm_pool.items() if now - last_used > LLM_POOL_IDLE_SECONDS]
+        due = _retire_llms(stale, now)
+        pooled = _llm_pool.get(key)
+        if pooled is not None:
+            _llm_pool[key] = (pooled[0], now)
+            _llm_pool.move_to_end(key)
+    for retired in due:
+        _close_llm(retired)
+    if pooled is not None:
+        return pooled[0]
+
+    llm = _construct_llm(provider, model_name, api_key, chat_mode, kwargs)
+
+    with _llm_pool_lock:
+        # a concurrent request may have built the same client meanwhile
+        replaced = [key] if key in _llm_pool else []
+        due = _retire_llms(replaced, now)
+        _llm_pool[key] = (llm, now)
+        _llm_pool.move_to_end(key)
+        due += _retire_llms(list(_llm_pool)[:max(0, len(_llm_pool) - LLM_POOL_SIZE)], now)
+    for retired in due:
+        _close_llm(retired)
+    return llm
+
+
+def _construct_llm(provider: str, model_name: str, api_key: str, chat_mode: bool, kwargs: dict):
+    # OpenAI-compatible clients get their own HTTP clients, so the pool decides
+    # when their connections are closed (see _close_llm)
     if provider == "OpenAI":
-        return ChatOpenAI(model=model_name, api_key=api_key, **kwargs)
+        return ChatOpenAI(
+            model=model_name,
+            api_key=api_key,
+            http_client=DefaultHttpxClient(),
+            http_async_client=DefaultAsyncHttpxClient(),
+            **kwargs,
+        )
 
     if provider == "Google":
         google_model = ChatGoogleGenerativeAI if chat_mode else GoogleGenerativeAI
@@ -176,6 +279,8 @@ def build_llm(model_name: str, api_key: str | None, temperature: float | None, c
             model=model_name,
             api_key=api_key,
             base_url="https://openrouter.ai/api/v1",
+            http_client=DefaultHttpxClient(),
+            http_async_client=DefaultAsyncHttpxClient(),
             **kwargs,
         )
 
@@ -198,6 +303,42 @@ def get_available_api_keys(model: str | None = None):
     return keys
 
 
+# cache / pool stats and warm-up are operator endpoints: they need the
+# X-Admin-Token header to match ADMIN_TOKEN, and are disabled when it is unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def _require_admin(request: Request):
+    token = request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Admin token required.")
+
+
+@app.get("/llm_cache/stats", dependencies=[Depends(_require_admin)])
+def get_llm_cache_stats():
+    return cacheStats()
+
+
+@app.get("/solr_cache/stats", dependencies=[Depends(_require_admin)])
+def get_solr_cache_stats():
+    return translationStats()
+
+
+@app.get("/sqlite/stats", dependencies=[Depends(_require_admin)])
+def get_sqlite_stats():
+    return poolStats()
+
+
+@app.get("/content_cache/stats", dependencies=[Depends(_require_admin)])
+def get_content_cache_stats():
+    return contentCacheStats()
+
+
+@app.post("/content_cache/warm", dependencies=[Depends(_require_admin)])
+def warm_content_cache(accessions: List[str] = Body(...)):
+    return {"entries": warmContentCache(accessions, sqliteDb)}
+
+
 @app.on_event("startup")
 def on_startup():
     # this will download/cache & move to GPU/CPU exactly once
@@ -208,6 +349,12 @@ def on_startup():
     print("[FastAPI] ProtT5 model loaded on startup.")
     bm25_initialize()
     print("[FastAPI] Documentes related to BM25 loaded on startup.")
+    getPromptSchema(sqliteDb)
+    print("[FastAPI] Solr prompt schema loaded on startup.")
+    getMetadataStore(sqliteDb)
+    print("[FastAPI] Protein metadata store loaded on startup.")
+    warmContentCache(db_path=sqliteDb)
+    print("[FastAPI] Hot-record content cache warmed on startup.")
 
 
 class LLMRequest(BaseModel):
@@ -218,66 +365,184 @@ class LLMRequest(BaseModel):
     retry_count: int
     question: str
     temperature: float | None = None 
+    # hedged mode: run this many candidate generations concurrently and keep
+    # the first one whose UniProt query returns results
+    hedge: int = Field(default=1, ge=1, le=8)
+    # optional per-candidate models / temperatures, used round-robin
+    hedge_models: List[str] | None = None
+    hedge_temperatures: List[float | None] | None = None
 
 
 class LLMResponse(BaseModel):
     solr_query: str
     results: dict
     logs: str | None = None
+    spans: list[dict] | None = None
+
+
+async def _solr_attempt(llm, question, limit, searchfields, queryfields, resultfields, field_schema, verbose=False):
+    with span("llm.generate_solr", model=getattr(llm, "model_name", None) or getattr(llm, "model", None)):
+        solr_query = await agenerate_solr_query(
+            question, llm, searchfields, queryfields, resultfields
+        )
+    # reject or repair invalid syntax/fields locally before calling UniProt
+    solr_query, fixes = repairSolrQuery(solr_query, field_schema)
+    if fixes and verbose:
+        logger.info(f"Repaired Solr query ({'; '.join(fixes)}): {solr_query}")
+    results = await _uniprot_search(solr_query, limit)
+    return solr_query, results
+
+
+async def _uniprot_search(solr_query, limit):
+    with span("uniprot.search", query=solr_query, limit=limit) as attrs:
+        results = await runInExecutor(
+            asyncio.get_running_loop(), uniprot_executor, query_uniprot, solr_query, limit
+        )
+        attrs["results"] = len(results.get("results", []))
+    return results
 
 
 @app.post("/llm_query", response_model=LLMResponse)
-def llm_query(req: LLMRequest, request: Request):
-    # clear previous logs
-    log_stream.truncate(0)
-    log_stream.seek(0)
-
-    # load fields from SQLite + txt
-    conn = sqlite3.connect(sqliteDb)
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM search_fields")
-    searchfields = cur.fetchall()
-    with open("asset/queryfields.txt") as f:
-        queryfields = f.read()
-    cur.execute("SELECT * FROM result_fields")
-    resultfields = cur.fetchall()
-    conn.close()
+async def llm_query(req: LLMRequest, request: Request):
+    trace, token = startTrace("llm_query", req.verbose)
+    try:
+        response = await _llm_query(req, request)
+        if req.verbose:
+            response.logs = trace.logText()
+            response.spans = trace.spanList()
+        return response
+    finally:
+        endTrace(token)
+
+
+async def _llm_query(req: LLMRequest, request: Request):
+    # field tables, queryfields.txt and the validator schema are cached at
+    # startup and only reloaded when the source files change
+    schema = getPromptSchema(sqliteDb)
+    queryfields = schema.queryfields
+    field_schema = schema.field_schema
+    # only the fields relevant to the question go into the prompt; the
+    # validator still checks against the full schema
+    if SLIM_PROMPT:
+        prompt_searchfields, prompt_resultfields = schema.field_index.select(req.question)
+    else:
+        prompt_searchfields, prompt_resultfields = schema.searchfields, schema.resultfields
 
     try:
         m = req.model
-        llm = build_llm(m, req.api_key, req.temperature, client_id=_client_id(request))
+        client_id = _client_id(request)
+        # hedges share req.api_key, so they must go to the same provider
+        provider = get_provider_for_model_name(m)
+        for hedge_model in req.hedge_models or []:
+            if provider and get_provider_for_model_name(hedge_model) != provider:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Hedge model {hedge_model} is not served by {provider}, the provider of {m}.",
+                )
+        models = req.hedge_models or [m]
+        temperatures = req.hedge_temperatures or [req.temperature]
+        candidates = [
+            (models[i % len(models)], temperatures[i % len(temperatures)])
+            for i in range(req.hedge)
+        ]
+        llms = {}
+        for model_name, temperature in candidates:
+            if (model_name, temperature) not in llms:
+                llms[(model_name, temperature)] = build_llm(
+                    model_name, req.api_key, temperature, client_id=client_id, enforce_rate=False
+                )
+        # the stored-key rate limit is charged once for the request here and
+        # once more for every extra concurrent call in the hedge loop below
+        if req.api_key == STORED_KEY_SENTINEL and provider == "OpenAI":
+            _enforce_embedded_openai_rate(client_id)
 
         if req.verbose:
-            logger.info(f"Using model={m}, question={req.question}, limit={req.limit}, retries={req.retry_count}")
+            logger.info(f"Using model={m}, question={req.question}, limit={req.limit}, retries={req.retry_count}, hedge={req.hedge}")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    # retry loop to generate Solr query + fetch
-    solr_query = ""
-    results = {"results": []}
-    last_error = None
-    for attempt in range(1, req.retry_count + 1):
+    # a question already translated by one of the request's models skips the
+    # LLM entirely; translations are stored under the model that produced them
+    loop = asyncio.get_running_loop()
+    cached_query, cached_model = None, None
+    for model_name in dict.fromkeys(models):
+        cached_query = await runInExecutor(loop, None, lookupTranslation, req.question, model_name)
+        if cached_query:
+            cached_model = model_name
+            break
+    if cached_query:
         try:
-            if req.verbose:
-                logger.info(f"Attempt {attempt}: generating Solr query")
-            solr_query = generate_solr_query(
-                req.question, llm, searchfields, queryfields, resultfields
-            )
-            results = query_uniprot(solr_query, req.limit)
-            last_error = None
+            results = await _uniprot_search(cached_query, req.limit)
             if results.get("results"):
                 if req.verbose:
-                    logger.info(f"Success on attempt {attempt}")
-                break
-            else:
-                if req.verbose:
-                    logger.warning(f"No results on attempt {attempt}")
+                    logger.info(f"Served cached translation: {cached_query}")
+                return LLMResponse(solr_query=cached_query, results=results)
+            await runInExecutor(loop, None, markStale, req.question, cached_model)
         except Exception as e:
-            last_error = e
-            logger.error(f"Error on attempt {attempt}: {e}")
-        time.sleep(3)
+            logger.error(f"Cached translation failed: {e}")
+
+    # retry loop to generate Solr query + fetch; each round launches up to
+    # `hedge` candidates at once and cancels the rest on the first hit
+    solr_query = ""
+    results = {"results": []}
+    winning_model = m
+    last_error = None
+    attempt = 0
+    while attempt < req.retry_count:
+        batch = min(req.hedge, req.retry_count - attempt)
+        if req.api_key == STORED_KEY_SENTINEL and provider == "OpenAI":
+            for extra in range(1, batch):
+                try:
+                    _enforce_embedded_openai_rate(client_id)
+                except HTTPException:
+                    # out of stored-key budget: run the round with fewer hedges
+                    logger.warning(f"Stored-key rate limit reached, hedging with {extra} call(s)")
+                    batch = extra
+                    break
+        tasks = {}
+        for i in range(batch):
+            attempt += 1
+            model_name, temperature = candidates[i]
+            if req.verbose:
+                logger.info(f"Attempt {attempt}: generating Solr query with {model_name} (temperature={temperature})")
+            task = asyncio.create_task(_solr_attempt(
+                llms[(model_name, temperature)], req.question, req.limit,
+                prompt_searchfields, queryfields, prompt_resultfields, field_schema, req.verbose,
+            ))
+            tasks[task] = (attempt, model_name)
+
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task_attempt, task_model = tasks[task]
+                    try:
+                        solr_query, results = task.result()
+                        winning_model = task_model
+                        last_error = None
+                        if results.get("results"):
+                            if req.verbose:
+                                logger.info(f"Success on attempt {task_attempt} ({task_model})")
+                            break
+                        else:
+                            if req.verbose:
+                                logger.warning(f"No results on attempt {task_attempt}")
+                    except Exception as e:
+                        last_error = e
+                        logger.error(f"Error on attempt {task_attempt}: {e}")
+                if results.get("results"):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if results.get("results"):
+            break
+        if attempt < req.retry_count:
+            await asyncio.sleep(3)
 
     if not results.get("results") and last_error is not None:
         raise HTTPException(
@@ -285,16 +550,17 @@ def llm_query(req: LLMRequest, request: Request):
             detail=f"LLM query failed after {req.retry_count} attempts: {last_error}",
         )
 
-    return LLMResponse(
-        solr_query=solr_query,
-        results=results,
-        logs=(log_stream.getvalue() if req.verbose else None)
+    await runInExecutor(
+        loop, None, storeTranslation, req.question, winning_model, solr_query, bool(results.get("results"))
     )
 
+    return LLMResponse(solr_query=solr_query, results=results)
+
 
 class VectorRequest(BaseModel):
     sequence: str
     similarity_threshold: float = 0.8
+    verbose: bool = False
 
 
 class VectorResponse(BaseModel):
@@ -302,10 +568,22 @@ class VectorResponse(BaseModel):
     search_time: float
     found_embeddings: list[dict]
     go_enrichment: list[dict]
+    spans: list[dict] | None = None
 
 
 @app.post("/vector_search", response_model=VectorResponse)
 def vector_search(req: VectorRequest):
+    trace, token = startTrace("vector_search", req.verbose)
+    try:
+        response = _vector_search(req)
+        if req.verbose:
+            response.spans = trace.spanList()
+        return response
+    finally:
+        endTrace(token)
+
+
+def _vector_search(req: VectorRequest):
     raw = req.sequence.strip()
     if raw.startswith(">"):
         seq = "".join(line for line in raw.splitlines() if not line.startswith(">"))
@@ -314,11 +592,12 @@ def vector_search(req: VectorRequest):
 
 
     t0 = datetime.now()
-    embDict, _ = getEmbeddings(
-        seq_dict={"query_protein": seq},
-        visualize=False,
-        per_protein=True
-    )
+    with span("embedding", length=len(seq)):
+        embDict, _ = getEmbeddings(
+            seq_dict={"query_protein": seq},
+            visualize=False,
+            per_protein=True
+        )
     embedding_time = (datetime.now() - t0).total_seconds()
 
     try:
@@ -331,14 +610,17 @@ def vector_search(req: VectorRequest):
 
     # nearest neighbour search
     t1 = datetime.now()
-    df = searchSpecificEmbedding(query_embedding, threshold=req.similarity_threshold)
+    with span("vector.search", threshold=req.similarity_threshold) as attrs:
+        df = searchSpecificEmbedding(query_embedding, threshold=req.similarity_threshold)
+        attrs["hits"] = len(df)
     search_time = (datetime.now() - t1).total_seconds()
 
     df_final = df[df["Similarity"] >= 0.90]
     found = df.to_dict(orient="records")
 
     proteins = [rec["Protein ID"].strip("<>").split(">")[-1] for rec in found]
-    go_df = findRelatedGoIds(proteins, dbPath=sqliteDb)
+    with span("go.enrichment", proteins=len(proteins)):
+        go_df = findRelatedGoIds(proteins, dbPath=sqliteDb)
     go_records = go_df.to_dict(orient="records")
 
     return VectorResponse(
@@ -362,18 +644,31 @@ class RAGRequest(BaseModel):
     top_k: int
     chat_history: List[RAGChatMessage] = Field(default_factory=list)
     temperature: float | None = None
+    # chat thread id; follow-up turns on the same sequence reuse its retrieval
+    conversation_id: str | None = None
+    refresh_retrieval: bool = False
+    verbose: bool = False
+    # return the protein_info rows of protein_ids inline (saves the
+    # follow-up /rag_order/protein_info request)
+    include_metadata: bool = False
 
 
 class RAGResponse(BaseModel):
     answer: str
     protein_ids: List[str]
     suggested_followups: List[str]
+    protein_info: list[dict] | None = None
+    logs: str | None = None
+    spans: list[dict] | None = None
 
 
-def safe_answer_with_proteins(llm, query, sequence, top_k, chat_history=None, max_attempts=6):
+async def safe_answer_with_proteins(llm, query, sequence, top_k, chat_history=None, max_attempts=6, conversation_id=None, refresh_retrieval=False):
     try:
         print(f"Trying top_k = {top_k}")
-        answer, protein_ids, suggested_followups = answerWithProteins(llm, query, sequence, top_k, chat_history)
+        answer, protein_ids, suggested_followups = await aanswerWithProteins(
+            llm, query, sequence, top_k, chat_history, conversation_id, refresh_retrieval,
+            executor=retrieval_executor,
+        )
         return answer, protein_ids, suggested_followups
     except Exception as e:
         print(f"Initial top_k={top_k} failed: {e}")
@@ -393,7 +688,10 @@ def safe_answer_with_proteins(llm, query, sequence, top_k, chat_history=None, ma
         mid = (low + high) // 2
         print(f"Trying fallback top_k = {mid}")
         try:
-            answer, protein_ids, suggested_followups = answerWithProteins(llm, query, sequence, mid, chat_history)
+            answer, protein_ids, suggested_followups = await aanswerWithProteins(
+                llm, query, sequence, mid, chat_history, conversation_id,
+                executor=retrieval_executor,
+            )
             best_answer = answer
             best_ids = protein_ids
             best_followups = suggested_followups
@@ -409,7 +707,19 @@ def safe_answer_with_proteins(llm, query, sequence, top_k, chat_history=None, ma
     return best_answer, best_ids, best_followups
 
 @app.post("/rag_order", response_model=RAGResponse)
-def rag_order(req: RAGRequest, request: Request):
+async def rag_order(req: RAGRequest, request: Request):
+    trace, token = startTrace("rag_order", req.verbose)
+    try:
+        response = await _rag_order(req, request)
+        if req.verbose:
+            response.logs = trace.logText()
+            response.spans = trace.spanList()
+        return response
+    finally:
+        endTrace(token)
+
+
+async def _rag_order(req: RAGRequest, request: Request):
     try:
         m = req.model
         llm = build_llm(m, req.api_key, req.temperature, chat_mode=True, client_id=_client_id(request))
@@ -423,19 +733,30 @@ def rag_order(req: RAGRequest, request: Request):
             message.model_dump() if hasattr(message, "model_dump") else message.dict()
             for message in req.chat_history
         ]
-        answer, protein_ids, suggested_followups = safe_answer_with_proteins(
+        answer, protein_ids, suggested_followups = await safe_answer_with_proteins(
             llm,
             req.question,
             req.sequence,
             req.top_k,
             chat_history,
+            conversation_id=req.conversation_id,
+            refresh_retrieval=req.refresh_retrieval,
         )
         if answer is None:
             answer = ""
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG generation failed: {e}")
 
-    return RAGResponse(answer=answer, protein_ids=protein_ids, suggested_followups=suggested_followups or [])
+    protein_info = None
+    if req.include_metadata:
+        protein_info = lookupProteinInfo(protein_ids, sqliteDb).to_dict(orient="records")
+
+    return RAGResponse(
+        answer=answer,
+        protein_ids=protein_ids,
+        suggested_followups=suggested_followups or [],
+        protein_info=protein_info,
+    )
 
 class RAGProteinListRequest(BaseModel):
     protein_ids: List[str]
@@ -445,33 +766,6 @@ class RAGProteinInfoResponse(BaseModel):
 
 @app.post("/rag_order/protein_info", response_model=RAGProteinInfoResponse)
 def rag_order_with_protein_info(req: RAGProteinListRequest):
-    protein_ids = req.protein_ids
-    columns = ['Protein ID', 'Short Name', 'Protein Name', 'Organism', 'Taxon ID', 'Gene Name', 'pe', 'sv']
-    results = pd.DataFrame(columns=columns)
-
-    conn = sqlite3.connect(sqliteDb)
-
-    for pid in protein_ids:
-        infoDf = pd.read_sql_query(
-            "SELECT protein_name, type, os, ox, gn, pe, sv FROM protein_info WHERE protein_id = ?", conn, params=(pid,)
-        )
-
-        if not infoDf.empty:
-            row = {
-                'Protein ID': pid,
-                'Short Name': infoDf.iloc[0]['protein_name'],
-                'Protein Name': infoDf.iloc[0]['type'],
-                'Organism': infoDf.iloc[0]['os'],
-                'Taxon ID': infoDf.iloc[0]['ox'],
-                'Gene Name': infoDf.iloc[0]['gn'],
-                'pe': infoDf.iloc[0]['pe'],
-                'sv': infoDf.iloc[0]['sv']
-            }
-        else:
-            row = dict.fromkeys(columns, "")
-            row['Protein ID'] = pid
-        results.loc[len(results)] = row
-
-    conn.close()
+    results = lookupProteinInfo(req.protein_ids, sqliteDb)
 
     return RAGProteinInfoResponse(found_info=results.to_dict(orient="records"))
@@ -0,0 +1,87 @@
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+# flat file line codes that only identify the entry / species and should not
+# make two otherwise identical orthologs look different
+IGNORED_SECTIONS = {"ID", "AC", "DT", "OS", "OG", "OC", "OX", "OH", "RN", "RP", "RX", "RA", "RG", "RT", "RL", "SQ"}
+
+NUM_PERMUTATIONS = 128
+SHINGLE_SIZE     = 5
+SIMILARITY_CUTOFF = 0.8
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def sectionShingles(content, shingleSize=SHINGLE_SIZE):
+    """
+    Split a flat file record into its two-letter sections and build word
+    shingles per section, prefixed with the section code so that identical
+    text in different sections is not treated as the same shingle.
+    """
+    sections = {}
+    for line in (content or "").splitlines():
+        code = line[:2]
+        if not code.strip() or code in IGNORED_SECTIONS:
+            continue
+        sections.setdefault(code, []).append(line[5:])
+
+    shingles = set()
+    for code, lines in sections.items():
+        words = re.findall(r"\w+", " ".join(lines).lower())
+        if len(words) < shingleSize:
+            if words:
+                shingles.add(f"{code}:{' '.join(words)}")
+            continue
+        for i in range(len(words) - shingleSize + 1):
+            shingles.add(f"{code}:{' '.join(words[i:i + shingleSize])}")
+    return shingles
+
+
+def minhashSignature(shingles):
+    if not shingles:
+        return np.full(NUM_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64)
+    # (a * x + b) mod p for every permutation; x < 2**32 and a, b < 2**31 keep this inside uint64
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def collapseNearDuplicates(documents_df, threshold=SIMILARITY_CUTOFF):
+    """
+    Cluster retrieved records whose estimated Jaccard similarity (MinHash over
+    section-level shingles) is at least threshold. Each cluster is kept once,
+    under its highest ranked member, with every member accession listed in
+    'Member IDs' so the answer can still cite all of them.
+    """
+    if documents_df.empty:
+        return documents_df.assign(**{"Member IDs": pd.Series(dtype=object)})
+
+    rows = documents_df.reset_index(drop=True)
+    signatures = [minhashSignature(sectionShingles(content)) for content in rows["Content"]]
+
+    clusters = []  # list of (representative index, [member indices])
+    for i, signature in enumerate(signatures):
+        for representative, members in clusters:
+            if np.mean(signatures[representative] == signature) >= threshold:
+                members.append(i)
+                break
+        else:
+            clusters.append((i, [i]))
+
+    records = []
+    for representative, members in clusters:
+        record = rows.iloc[representative].to_dict()
+        memberIds = []
+        for m in members:
+            pid = rows.iloc[m]["Protein ID"]
+            if pid not in memberIds:
+                memberIds.append(pid)
+        record["Member IDs"] = memberIds
+        records.append(record)
+
+    return pd.DataFrame(records, columns=list(rows.columns) + ["Member IDs"])
@@ -0,0 +1,58 @@
+import threading
+
+try:
+    import zstandard
+except ImportError:  # only needed when the database holds compressed content
+    zstandard = None
+
+# zstd frame magic number; compressed rows are BLOBs starting with it, plain
+# rows are TEXT, so both layouts can be read by the same code
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+DICTIONARY_TABLE = "flat_files_dictionary"
+
+# ── module-level cache ───────────────────────────────────────────────────────
+_dictionaries: dict[int, bytes] = {}
+_local = threading.local()
+
+
+def loadDictionaries(conn):
+    """Read the trained zstd dictionaries (if any) from a connection's databases."""
+    for schema, in conn.execute("SELECT name FROM pragma_database_list").fetchall():
+        exists = conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (DICTIONARY_TABLE,)
+        ).fetchone()
+        if exists:
+            for dictId, data in conn.execute(f"SELECT dict_id, dictionary FROM {schema}.{DICTIONARY_TABLE}"):
+                _dictionaries[int(dictId)] = bytes(data)
+
+
+def _decompressor(dictId):
+    # ZstdDecompressor objects must not be shared between threads
+    cache = getattr(_local, "decompressors", None)
+    if cache is None:
+        cache = _local.decompressors = {}
+    if dictId not in cache:
+        if zstandard is None:
+            raise RuntimeError("flat_files content is zstd-compressed; install the 'zstandard' package")
+        if dictId and dictId not in _dictionaries:
+            raise RuntimeError(f"No zstd dictionary {dictId} in {DICTIONARY_TABLE}")
+        dictionary = zstandard.ZstdCompressionDict(_dictionaries[dictId]) if dictId else None
+        cache[dictId] = zstandard.ZstdDecompressor(dict_data=dictionary)
+    return cache[dictId]
+
+
+def decodeContent(value):
+    """flat_files.content as text, whether it is stored plain or compressed."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value.startswith(ZSTD_MAGIC):
+        return value.decode("utf-8")
+    dictId = zstandard.get_frame_parameters(value).dict_id if zstandard is not None else 0
+    return _decompressor(dictId).decompress(value).decode("utf-8")
+
+
+def registerDecoder(conn):
+    """Make flat_text(content) available in SQL on this connection."""
+    loadDictionaries(conn)
+    conn.create_function("flat_text", 1, decodeContent, deterministic=True)
@@ -0,0 +1,205 @@
+import os
+import sys
+import threading
+from collections import Counter, OrderedDict
+
+from src.sqlitePool import readConnection
+
+DB_PATH = "asset/protein_index2.db"
+# upper bound for the decoded record text held in memory; 0 disables the cache
+CONTENT_CACHE_MAX_BYTES = int(os.getenv("CONTENT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+# optional warm-up list: one accession per line, most frequently retrieved first
+CONTENT_CACHE_WARM_PATH = os.getenv("CONTENT_CACHE_WARM_PATH", "asset/hot_proteins.txt")
+IN_CHUNK_SIZE = 900
+
+CONTENT_BY_FILE_IDS_SQL = """
+    SELECT ff.file_id, ffm.protein_id, flat_text(ff.content)
+    FROM flat_files ff
+    JOIN flat_files_mapping ffm ON ffm.file_id = ff.file_id
+    WHERE ff.file_id IN ({})
+"""
+# flat_files.file_id is TEXT and flat_files_mapping.file_id INTEGER; the
+# cast keeps the join on the flat_files key instead of scanning flat_files
+CONTENT_BY_ACCESSIONS_SQL = """
+    SELECT m.protein_id, m.file_id, flat_text(f.content)
+    FROM flat_files_mapping m
+    JOIN flat_files f ON f.file_id = CAST(m.file_id AS TEXT)
+    WHERE m.protein_id IN ({})
+"""
+
+# ── module-level cache ───────────────────────────────────────────────────────
+# accession -> (file_id, decoded content), kept in least-recently-used order;
+# file_id is None for records seen through the FTS index only
+_records: "OrderedDict[str, tuple[str | None, str]]" = OrderedDict()
+_fileIds: dict[str, str] = {}
+_bytes = 0
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_requested: Counter = Counter()
+
+
+def _size(content):
+    return sys.getsizeof(content)
+
+
+def _drop(accession):
+    global _bytes
+    fileId, content = _records.pop(accession)
+    if fileId is not None:
+        _fileIds.pop(fileId, None)
+    _bytes -= _size(content)
+
+
+def _put(accession, fileId, content, evict=True):
+    global _bytes
+    if content is None or _size(content) > CONTENT_CACHE_MAX_BYTES:
+        return
+    with _lock:
+        if not evict and _bytes + _size(content) > CONTENT_CACHE_MAX_BYTES:
+            return
+        if accession in _records:
+            previousFileId, _ = _records[accession]
+            fileId = fileId if fileId is not None else previousFileId
+            _drop(accession)
+        _records[accession] = (fileId, content)
+        if fileId is not None:
+            _fileIds[fileId] = accession
+        _bytes += _size(content)
+        while _bytes > CONTENT_CACHE_MAX_BYTES:
+            _drop(next(iter(_records)))
+            _stats["evictions"] += 1
+
+
+def _get(accession):
+    with _lock:
+        _requested[accession] += 1
+        entry = _records.get(accession)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        _records.move_to_end(accession)
+        _stats["hits"] += 1
+        return entry
+
+
+def _chunks(values):
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        yield values[start:start + IN_CHUNK_SIZE]
+
+
+def contentForFileIds(file_ids, db_path=DB_PATH):
+    """
+    Return [(file_id, protein_id, content)] for flat_files ids, in the given
+    order, reading only the records that are not cached. Unknown ids are skipped.
+    """
+    file_ids = [str(fileId) for fileId in file_ids]
+    found, missing, unmapped = {}, [], set()
+    for fileId in file_ids:
+        with _lock:
+            accession = _fileIds.get(fileId)
+        entry = _get(accession) if accession is not None else None
+        if entry is None:
+            if accession is None:
+                # not counted by _get; the accession is only known after the read
+                unmapped.add(fileId)
+                with _lock:
+                    _stats["misses"] += 1
+            missing.append(fileId)
+        else:
+            found[fileId] = (accession, entry[1])
+
+    if missing:
+        with readConnection(db_path) as conn:
+            for chunk in _chunks(missing):
+                rows = conn.execute(CONTENT_BY_FILE_IDS_SQL.format(','.join('?' * len(chunk))), chunk).fetchall()
+                for fileId, accession, content in rows:
+                    found[str(fileId)] = (accession, content)
+                    _put(accession, str(fileId), content)
+                    if str(fileId) in unmapped:
+                        with _lock:
+                            _requested[accession] += 1
+
+    return [(fileId, *found[fileId]) for fileId in file_ids if fileId in found]
+
+
+def _readAccessions(accessions, db_path, evict=True):
+    found = {}
+    with readConnection(db_path) as conn:
+        for chunk in _chunks(accessions):
+            rows = conn.execute(CONTENT_BY_ACCESSIONS_SQL.format(','.join('?' * len(chunk))), chunk).fetchall()
+            for accession, fileId, content in rows:
+                found[accession] = content
+                _put(accession, str(fileId), content, evict)
+    return found
+
+
+def contentForAccessions(accessions, db_path=DB_PATH):
+    """
+    Return [(protein_id, content)] for accessions, in the given order,
+    reading only the records that are not cached. Unknown accessions are skipped.
+    """
+    found, missing = {}, []
+    for accession in accessions:
+        entry = _get(accession)
+        if entry is None:
+            missing.append(accession)
+        else:
+            found[accession] = entry[1]
+
+    if missing:
+        found.update(_readAccessions(missing, db_path))
+
+    return [(accession, found[accession]) for accession in accessions if accession in found]
+
+
+def rememberContent(accession, content):
+    """Cache a record read through another path (e.g. the FTS index)."""
+    _put(accession, None, content)
+
+
+def warmContentCache(accessions=None, db_path=DB_PATH):
+    """
+    Preload records, most important first, until the cache is full. Without
+    accessions the list is read from CONTENT_CACHE_WARM_PATH, if it exists.
+    Returns the number of cached records.
+    """
+    if accessions is None:
+        if not os.path.exists(CONTENT_CACHE_WARM_PATH):
+            with _lock:
+                return len(_records)
+        with open(CONTENT_CACHE_WARM_PATH) as f:
+            accessions = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    # read directly rather than through contentForAccessions: warm-up reads
+    # are not traffic and must not show up in the hit-rate metrics
+    with _lock:
+        missing = [accession for accession in accessions if accession not in _records]
+    for chunk in _chunks(missing):
+        with _lock:
+            full = _bytes >= CONTENT_CACHE_MAX_BYTES
+        if full:
+            break
+        # fill without evicting, so earlier (hotter) ids are never pushed out by later ones
+        _readAccessions(chunk, db_path, evict=False)
+    with _lock:
+        # hottest ids last, i.e. most recently used
+        for accession in reversed(accessions):
+            if accession in _records:
+                _records.move_to_end(accession)
+        entries, cachedBytes = len(_records), _bytes
+    print(f"[flatFileContentCache]: {entries} records ({cachedBytes / 1e6:.1f} MB) cached after warm-up")
+    return entries
+
+
+def contentCacheStats(top=20):
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(_records),
+            "bytes": _bytes,
+            "max_bytes": CONTENT_CACHE_MAX_BYTES,
+            # candidates for CONTENT_CACHE_WARM_PATH
+            "most_requested": [accession for accession, _ in _requested.most_common(top)],
+        }
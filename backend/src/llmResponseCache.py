@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from langchain_core.output_parsers import StrOutputParser
+
+from src.requestTrace import runInExecutor
+
+CACHE_DB_PATH   = os.getenv("LLM_CACHE_PATH", "asset/llm_cache.db")
+CACHE_ENABLED   = os.getenv("LLM_CACHE", "1").lower() not in ("0", "false", "no")
+# sampled outputs (temperature > 0 or the provider default) are not cached
+# unless this is set, since repeated calls are expected to differ
+CACHE_SAMPLED   = os.getenv("LLM_CACHE_SAMPLED", "").lower() in ("1", "true", "yes")
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_BYTES   = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CHARS_PER_TOKEN   = 4
+
+_lock = threading.Lock()
+_initialized = False
+_stats = {"hits": 0, "misses": 0, "bypassed": 0, "saved_tokens": 0}
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(CACHE_DB_PATH, timeout=10)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                tokens INTEGER,
+                size INTEGER,
+                created REAL,
+                last_access REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_response_cache_access ON llm_response_cache(last_access)")
+        conn.commit()
+        _initialized = True
+    return conn
+
+
+def _modelName(llm):
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+def cacheKey(prompt, llm, inputs):
+    """
+    Return (key, rendered prompt) for a prompt/llm/inputs triple, or
+    (None, None) when the call must not be served from the cache.
+    """
+    if not CACHE_ENABLED:
+        return None, None
+    temperature = getattr(llm, "temperature", None)
+    if temperature != 0 and not CACHE_SAMPLED:
+        with _lock:
+            _stats["bypassed"] += 1
+        return None, None
+
+    rendered = prompt.format_prompt(**inputs).to_string()
+    payload = json.dumps(
+        {
+            "llm": type(llm).__name__,
+            "model": _modelName(llm),
+            "temperature": temperature,
+            "prompt": rendered,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest(), rendered
+
+
+def getCached(key):
+    now = time.time()
+    with _lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT response, tokens FROM llm_response_cache WHERE cache_key = ? AND created > ?",
+            (key, now - CACHE_TTL_SECONDS),
+        ).fetchone()
+        if row is not None:
+            conn.execute("UPDATE llm_response_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            conn.commit()
+        conn.close()
+
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        _stats["hits"] += 1
+        _stats["saved_tokens"] += row[1]
+    return row[0]
+
+
+def putCached(key, llm, rendered, response):
+    now = time.time()
+    tokens = (len(rendered) + len(response)) // CHARS_PER_TOKEN
+    size = len(key) + len(response.encode("utf-8"))
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_response_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, _modelName(llm), response, tokens, size, now, now),
+        )
+        # drop expired rows, then least recently used ones until under the size cap
+        conn.execute("DELETE FROM llm_response_cache WHERE created <= ?", (now - CACHE_TTL_SECONDS,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_response_cache").fetchone()[0]
+        if total > CACHE_MAX_BYTES:
+            for cacheKeyToDrop, rowSize in conn.execute(
+                "SELECT cache_key, size FROM llm_response_cache ORDER BY last_access"
+            ).fetchall():
+                if total <= CACHE_MAX_BYTES:
+                    break
+                conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (cacheKeyToDrop,))
+                total -= rowSize
+        conn.commit()
+        conn.close()
+
+
+def invokeWithCache(prompt, llm, inputs):
+    key, rendered = cacheKey(prompt, llm, inputs)
+    if key is not None:
+        cached = getCached(key)
+        if cached is not None:
+            return cached
+
+    output = (prompt | llm | StrOutputParser()).invoke(inputs)
+    if key is not None:
+        putCached(key, llm, rendered, output)
+    return output
+
+
+async def ainvokeWithCache(prompt, llm, inputs):
+    # the cache is synchronous sqlite3 behind a lock; keep it off the event loop
+    loop = asyncio.get_running_loop()
+    key, rendered = cacheKey(prompt, llm, inputs)
+    if key is not None:
+        cached = await runInExecutor(loop, None, getCached, key)
+        if cached is not None:
+            return cached
+
+    output = await (prompt | llm | StrOutputParser()).ainvoke(inputs)
+    if key is not None:
+        await runInExecutor(loop, None, putCached, key, llm, rendered, output)
+    return output
+
+
+def cacheStats():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
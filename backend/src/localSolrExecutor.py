@@ -0,0 +1,212 @@
+import re
+import sqlite3
+
+from src.solrQueryValidator import SolrQueryError, parseSolrQuery
+from src.sqlitePool import fullScans, readConnection
+
+DB_PATH = "asset/protein_index2.db"
+# fts5 trigram index: shorter terms cannot be looked up, only scanned
+MIN_FTS_TERM = 3
+
+LOCAL_SOLR_SQL = """
+    SELECT p.protein_id, p.protein_name, p.type, p.os, p.ox, p.gn, p.pe, p.sv
+    FROM protein_info p
+    WHERE {where}
+    LIMIT ?
+"""
+
+
+class UnsupportedQueryError(SolrQueryError):
+    """The query is valid UniProt syntax but uses a field the local engine cannot evaluate."""
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"')
+    return value
+
+
+def _hasWildcard(value):
+    return "*" in value or "?" in value
+
+
+def _likePattern(value, contains):
+    pattern = value.replace("%", r"\%").replace("_", r"\_").replace("*", "%").replace("?", "_")
+    return f"%{pattern}%" if contains and not _hasWildcard(value) else pattern
+
+
+def _columnMatch(column, value, contains=False):
+    if value == "*":
+        return f"({column} IS NOT NULL AND {column} != '')", []
+    if _hasWildcard(value) or contains:
+        return f"{column} LIKE ? ESCAPE '\\'", [_likePattern(value, contains)]
+    return f"{column} = ? COLLATE NOCASE", [value]
+
+
+def _termMatch(kind, value):
+    # protein_terms holds the flat file fields as lower-case (kind, term)
+    # rows, written at build time by config/uniprotDatReader.py
+    subquery = "p.protein_id IN (SELECT protein_id FROM protein_terms WHERE kind = ?{})"
+    value = value.lower()
+    if value == "*":
+        return subquery.format(""), [kind]
+    if _hasWildcard(value[:-1]) or value.endswith("?"):
+        raise UnsupportedQueryError(f"Only trailing wildcards are supported locally: {value!r}")
+    if value.endswith("*"):
+        prefix = value[:-1]
+        return subquery.format(" AND term >= ? AND term < ?"), [kind, prefix, prefix + "\U0010ffff"]
+    return subquery.format(" AND term = ?"), [kind, value]
+
+
+def _rangeMatch(expression, value):
+    match = re.fullmatch(r"([\[{])(\S+) TO (\S+)([\]}])", value)
+    if not match:
+        return f"{expression} = ?", [int(value)]
+    openBr, low, high, closeBr = match.groups()
+    clauses, params = [], []
+    if low != "*":
+        clauses.append(f"{expression} {'>=' if openBr == '[' else '>'} ?")
+        params.append(int(low))
+    if high != "*":
+        clauses.append(f"{expression} {'<=' if closeBr == ']' else '<'} ?")
+        params.append(int(high))
+    return "(" + (" AND ".join(clauses) or f"{expression} IS NOT NULL") + ")", params
+
+
+def _fieldPredicate(field, rawValue):
+    value = _unquote(rawValue)
+
+    if field == "accession":
+        # accessions are stored upper-case; an exact match keeps the primary key usable
+        if not _hasWildcard(value):
+            return "p.protein_id = ?", [value.upper()]
+        return _columnMatch("p.protein_id", value.upper())
+    if field == "id":
+        return _columnMatch("p.protein_name", value)
+    if field == "protein_name":
+        return _columnMatch("p.type", value, contains=True)
+    if field == "gene":
+        return _columnMatch("p.gn", value)
+    if field == "gene_exact":
+        return "p.gn = ?", [value]
+    if field == "organism_id":
+        return "p.ox = ?", [value]
+    if field == "existence":
+        return "p.pe = ?", [value]
+    if field == "reviewed":
+        # the local database only holds Swiss-Prot (reviewed) entries;
+        # unreviewed ones are only known to the remote service
+        if value.lower() != "true":
+            raise UnsupportedQueryError("reviewed:false needs the remote UniProt service")
+        return "1 = 1", []
+    if field == "organism_name":
+        return _columnMatch("p.os", value)
+    if field == "taxonomy_name":
+        return _termMatch("taxonomy", value)
+    if field == "keyword":
+        return _termMatch("keyword", value)
+    if field == "fragment":
+        clause, params = _termMatch("fragment", "true")
+        return (clause if value.lower() == "true" else f"NOT {clause}"), params
+    if field == "ec":
+        return _termMatch("ec", value)
+    if field == "database":
+        return _termMatch("database", value)
+    if field == "xref":
+        database, _, identifier = value.partition("-")
+        if not identifier:
+            return _termMatch("database", database)
+        return _termMatch("xref", value)
+    if field == "go":
+        if value == "*":
+            return "p.protein_id IN (SELECT protein_id FROM protein_go_mapping)", []
+        goId = re.fullmatch(r"(?:GO:)?(\d{7})", value, re.IGNORECASE)
+        if goId:
+            return (
+                "p.protein_id IN (SELECT protein_id FROM protein_go_mapping WHERE go_id = ?)",
+                [f"GO:{goId.group(1)}"],
+            )
+        return (
+            "p.protein_id IN (SELECT g.protein_id FROM protein_go_mapping g "
+            "JOIN go_info i ON i.go_id = g.go_id WHERE i.go_name LIKE ? ESCAPE '\\')",
+            [_likePattern(value, contains=True)],
+        )
+    if field == "length":
+        clause, params = _rangeMatch("length", value)
+        return f"p.protein_id IN (SELECT protein_id FROM sequence_checksums WHERE {clause})", params
+
+    raise UnsupportedQueryError(f"Field {field!r} is not supported by the local query engine")
+
+
+def _compile(node, field=None):
+    kind = node[0]
+    if kind in ("AND", "OR"):
+        parts = [_compile(part, field) for part in node[1]]
+        return "(" + f" {kind} ".join(p[0] for p in parts) + ")", [x for p in parts for x in p[1]]
+    if kind == "NOT":
+        clause, params = _compile(node[1], field)
+        return f"NOT {clause}", params
+    if kind == "GROUP":
+        clause, params = _compile(node[1], field)
+        return f"({clause})", params
+    if kind == "FIELD":
+        return _compile(node[2], node[1])
+    # TERM
+    if field is not None:
+        return _fieldPredicate(field, node[1])
+    value = _unquote(node[1])
+    if value == "*":
+        return "1 = 1", []
+    if _hasWildcard(value) or len(value) < MIN_FTS_TERM:
+        raise UnsupportedQueryError(f"Free text {value!r} cannot be looked up in the trigram index")
+    # flat_files_fts rows share their rowid with flat_files_mapping.file_id
+    return (
+        "p.protein_id IN (SELECT m.protein_id FROM flat_files_mapping m "
+        "WHERE m.file_id IN (SELECT rowid FROM flat_files_fts WHERE flat_files_fts MATCH ?))",
+        ['"' + value.replace('"', '""') + '"'],
+    )
+
+
+def _toUniprotEntry(row):
+    protein_id, protein_name, description, os_name, ox, gn, pe, sv = row
+    entry = {
+        "entryType": "UniProtKB reviewed (Swiss-Prot)",
+        "primaryAccession": protein_id,
+        "uniProtkbId": protein_name,
+        "organism": {"scientificName": os_name, "taxonId": int(ox) if ox and str(ox).isdigit() else ox},
+        "proteinDescription": {"recommendedName": {"fullName": {"value": description}}},
+        "genes": [{"geneName": {"value": gn}}] if gn else [],
+    }
+    if pe:
+        entry["proteinExistence"] = pe
+    if sv and str(sv).isdigit():
+        entry["entryAudit"] = {"sequenceVersion": int(sv)}
+    return entry
+
+
+def compileLocalSolrQuery(solr_query, limit):
+    """SQL and parameters for a Solr query; raises UnsupportedQueryError for unsupported fields."""
+    where, params = _compile(parseSolrQuery(solr_query))
+    return LOCAL_SOLR_SQL.format(where=where), params + [int(limit)]
+
+
+def executeLocalSolrQuery(solr_query, limit, db_path=DB_PATH):
+    """
+    Evaluate a UniProt Solr query against the local SQLite tables
+    (protein_info, protein_terms, sequence_checksums, protein_go_mapping,
+    go_info, flat_files_fts) and return a dict shaped like the UniProt REST
+    search response ({"results": [...]}).
+    Raises UnsupportedQueryError for fields the local engine cannot evaluate
+    and for queries it could only answer by scanning a whole table.
+    """
+    sql, params = compileLocalSolrQuery(solr_query, limit)
+    with readConnection(db_path) as conn:
+        try:
+            scans = fullScans(conn, sql, params)
+        except sqlite3.OperationalError as e:
+            # e.g. a database built before protein_terms existed
+            raise UnsupportedQueryError(f"Local database cannot answer {solr_query!r}: {e}") from e
+        if scans:
+            raise UnsupportedQueryError(f"Local query would scan {', '.join(scans)}: {solr_query!r}")
+        rows = conn.execute(sql, params).fetchall()
+    return {"results": [_toUniprotEntry(row) for row in rows]}
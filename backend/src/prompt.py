@@ -1,19 +1,16 @@
-from langchain_core.output_parsers import StrOutputParser
+import os
 from langchain_core.prompts import PromptTemplate
-import requests
+from src.llmResponseCache import invokeWithCache, ainvokeWithCache
+from src.localSolrExecutor import executeLocalSolrQuery, UnsupportedQueryError
+from src.uniprotResponseCache import cached_search_uniprot
 
-def generate_solr_query(question, llm, searchFields, queryFields, resultFields):
-    """
-    Generate a Solr query for the UniProt database from a natural language query.
+# "remote": rest.uniprot.org, "local": the SQLite protein database only,
+# "auto": local first, remote when the local engine cannot answer the query
+# (unsupported field, would need a full scan) or finds nothing
+UNIPROT_BACKEND = os.getenv("UNIPROT_BACKEND", "remote").lower()
 
-    Args:
-        question (str): The natural language question to convert.
-        llm (object): The language model to use for generating the query.
-
-    Returns:
-        str: The generated Solr query.
-    """
-    prompt = PromptTemplate(
+def build_solr_prompt():
+    return PromptTemplate(
         input_variables=["question", "searchfields", "queryfields", "resultfields"],
         template="""Task: Generate a Solr query for the UniProt database from a natural language query. 
 
@@ -85,8 +82,39 @@ Examples: Here are a few examples of generated Solr queries for particular natur
 The question is: {question} 
 Generate a Solr query for the UniProt database based on this natural language query."""
     )
-    chain = prompt | llm | StrOutputParser()
-    solr_query = chain.invoke(
+
+
+def generate_solr_query(question, llm, searchFields, queryFields, resultFields):
+    """
+    Generate a Solr query for the UniProt database from a natural language query.
+
+    Args:
+        question (str): The natural language question to convert.
+        llm (object): The language model to use for generating the query.
+
+    Returns:
+        str: The generated Solr query.
+    """
+    solr_query = invokeWithCache(
+        build_solr_prompt(),
+        llm,
+        {
+            "question": question,
+            "searchfields": searchFields,
+            "queryfields": queryFields,
+            "resultfields": resultFields,
+        }
+    )
+    return solr_query.strip()
+
+
+async def agenerate_solr_query(question, llm, searchFields, queryFields, resultFields):
+    """
+    Async variant of generate_solr_query (awaits the LLM with ainvoke).
+    """
+    solr_query = await ainvokeWithCache(
+        build_solr_prompt(),
+        llm,
         {
             "question": question,
             "searchfields": searchFields,
@@ -108,12 +136,15 @@ def query_uniprot(solr_query, limit):
     Returns:
         dict: The JSON response from the UniProt API.
     """
-    base_url = "https://rest.uniprot.org/uniprotkb/search"
-    params = {
-        "query": solr_query,
-        "format": "json",
-        "size": limit
-    }
-    response = requests.get(base_url, params=params, timeout=30)
-    response.raise_for_status()
-    return response.json()
+    if UNIPROT_BACKEND in ("local", "auto"):
+        try:
+            results = executeLocalSolrQuery(solr_query, limit)
+            # the local database only holds Swiss-Prot, so an empty local
+            # answer does not mean UniProt has no match
+            if results["results"] or UNIPROT_BACKEND == "local":
+                return results
+        except UnsupportedQueryError:
+            if UNIPROT_BACKEND == "local":
+                raise
+
+    return cached_search_uniprot(solr_query, limit)
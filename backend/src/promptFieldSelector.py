@@ -0,0 +1,163 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+
+SEARCH_FIELDS_JSON = "asset/search-fields.json"
+TOP_SEARCH_FIELDS  = 25
+TOP_RESULT_FIELDS  = 15
+# off until the query-success rate on test/queries.txt has been measured
+# against the full field list
+SLIM_PROMPT        = os.getenv("SLIM_SOLR_PROMPT", "0").lower() in ("1", "true", "yes")
+
+# fields most questions need, and every field the prompt's own examples use;
+# always offered to the LLM
+ALWAYS_INCLUDE = [
+    "accession", "protein_name", "gene", "organism_name", "organism_id", "taxonomy_name",
+    "reviewed", "keyword", "go", "ec", "xref", "database", "length", "mass",
+    "organelle", "ft_positional",
+]
+# the prompt forbids "id" in queries
+EXCLUDED_SEARCH_TERMS = {"id"}
+# result fields offered for every question
+ALWAYS_INCLUDE_RESULTS = ["accession", "protein_name", "gene_names", "organism_name", "length"]
+
+# question words whose field labels do not say so: word -> words added to the
+# BM25 query (plural "s" is stripped before the lookup)
+_SCL = "subcellular location scl term"
+_TISSUE = "tissue specificity"
+_PTM = "ptm post translational modification modified residue"
+_INTERACTION = "interactor binary interaction subunit"
+SYNONYMS = {
+    "3d": "structure_3d", "structure": "structure_3d", "crystal": "structure_3d", "pdb": "structure_3d",
+    "nmr": "structure_3d", "cryo": "structure_3d",
+    "expressed": _TISSUE, "expression": _TISSUE, "liver": _TISSUE, "brain": _TISSUE, "heart": _TISSUE,
+    "kidney": _TISSUE, "lung": _TISSUE, "muscle": _TISSUE, "skin": _TISSUE, "blood": _TISSUE,
+    "mitochondrial": _SCL, "mitochondria": _SCL, "mitochondrion": _SCL, "nuclear": _SCL, "nucleus": _SCL,
+    "cytoplasmic": _SCL, "cytoplasm": _SCL, "cytosolic": _SCL, "membrane": _SCL, "secreted": _SCL,
+    "extracellular": _SCL, "localized": _SCL, "localised": _SCL, "located": _SCL, "localization": _SCL,
+    "interact": _INTERACTION, "interacting": _INTERACTION, "partner": _INTERACTION, "complex": _INTERACTION,
+    "binds": _INTERACTION,
+    "modification": _PTM, "modified": _PTM, "translational": _PTM, "phosphorylation": _PTM,
+    "phosphorylated": _PTM, "acetylation": _PTM, "ubiquitination": _PTM, "methylation": _PTM,
+    "glycosylated": "glycosylation", "lipidated": "lipidation",
+    "disease": "disease", "disorder": "disease", "syndrome": "disease", "cancer": "disease",
+    "enzyme": "ec enzyme catalytic activity", "catalyze": "catalytic activity", "catalyse": "catalytic activity",
+    "weight": "mass", "kda": "mass", "dalton": "mass", "long": "length", "amino": "length", "residue": "length",
+}
+
+BM25_K1 = 1.5
+BM25_B  = 0.75
+
+
+def _tokens(text):
+    # split identifiers like "cc_scl_term" into their parts as well
+    words = re.findall(r"[a-z0-9]+", (text or "").lower().replace("_", " "))
+    return [w for w in words if len(w) > 1]
+
+
+class _BM25:
+    def __init__(self, documents):
+        self.docs = [Counter(_tokens(d)) for d in documents]
+        self.lengths = [sum(d.values()) for d in self.docs]
+        self.avgLength = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        df = Counter(t for d in self.docs for t in d)
+        n = len(self.docs)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, query):
+        terms = set(_tokens(query))
+        out = []
+        for doc, length in zip(self.docs, self.lengths):
+            score = 0.0
+            for t in terms:
+                tf = doc.get(t)
+                if tf:
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / (self.avgLength or 1))
+                    score += self.idf[t] * tf * (BM25_K1 + 1) / norm
+            out.append(score)
+        return out
+
+
+def _expand(question):
+    extra = []
+    for word in _tokens(question):
+        synonyms = SYNONYMS.get(word) or SYNONYMS.get(word[:-1] if word.endswith("s") else word)
+        if synonyms:
+            extra.append(synonyms)
+    return " ".join([question or "", *extra])
+
+
+class FieldIndex:
+    """
+    BM25 index over search fields (term, label, example) and result fields
+    (name, label, group), used to put only the fields relevant to a question
+    into the Solr generation prompt. Questions are expanded with SYNONYMS
+    first, since labels rarely use the words people ask with.
+    """
+
+    def __init__(self, searchFields=(), resultFields=(), jsonPath=SEARCH_FIELDS_JSON):
+        entries = {}
+
+        def walk(items, parentLabel=""):
+            for item in items:
+                label = item.get("label") or parentLabel
+                if item.get("term"):
+                    entries[item["term"]] = (label, item.get("dataType") or "", item.get("example") or "")
+                walk(item.get("items", []), label)
+                walk(item.get("siblings", []), label)
+
+        try:
+            with open(jsonPath) as f:
+                walk(json.load(f))
+        except OSError:
+            pass
+        # (id, label, itemType, term, dataType, fieldType, example, regex)
+        for row in searchFields:
+            if row[3]:
+                entries[row[3]] = (row[1] or "", row[4] or "", row[6] or "")
+
+        for term in EXCLUDED_SEARCH_TERMS:
+            entries.pop(term, None)
+        if "xref" in entries:
+            # shared by every cross-reference sibling; the label of the last one is misleading
+            entries["xref"] = ("Cross-reference, value is <db>-<id>", "string", "pfam-PF00059")
+
+        self.searchTerms = list(entries)
+        self.searchLines = [
+            f"{term} | {label} | {dataType}" + (f" | e.g. {example}" if example else "")
+            for term, (label, dataType, example) in entries.items()
+        ]
+        self.searchIndex = _BM25(f"{t} {l} {e}" for t, (l, _, e) in entries.items())
+
+        # (id, groupName, isDatabaseGroup, label, name, sortField)
+        self.resultNames = [row[4] for row in resultFields]
+        self.resultLines = [f"{row[4]} | {row[3]} | {row[1]}" for row in resultFields]
+        self.resultIndex = _BM25(f"{row[4]} {row[3]} {row[1]}" for row in resultFields)
+
+    def select(self, question, topSearch=TOP_SEARCH_FIELDS, topResult=TOP_RESULT_FIELDS):
+        """Return (search fields, result fields) as compact one-field-per-line text."""
+        query = _expand(question)
+        scores = self.searchIndex.scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        chosen = [self.searchTerms.index(t) for t in ALWAYS_INCLUDE if t in self.searchTerms]
+        limit = topSearch + len(chosen)
+        for i in ranked:
+            if len(chosen) >= limit or scores[i] <= 0:
+                break
+            # "<term>_exp" only narrows "<term>" to experimental evidence;
+            # offer the plain field alongside it
+            term = self.searchTerms[i]
+            base = term[:-len("_exp")] if term.endswith("_exp") else None
+            for j in ([self.searchTerms.index(base)] if base in self.searchTerms else []) + [i]:
+                if j not in chosen:
+                    chosen.append(j)
+        searchText = "term | label | type | example\n" + "\n".join(self.searchLines[i] for i in chosen)
+
+        scores = self.resultIndex.scores(query)
+        ranked = [i for i in sorted(range(len(scores)), key=lambda i: scores[i], reverse=True) if scores[i] > 0]
+        chosen = [self.resultNames.index(n) for n in ALWAYS_INCLUDE_RESULTS if n in self.resultNames]
+        chosen += [i for i in ranked if i not in chosen][:topResult]
+        resultText = "name | label | group\n" + "\n".join(self.resultLines[i] for i in chosen)
+        return searchText, resultText
@@ -1,14 +1,18 @@
+import asyncio
+import functools
 import json
 
 import pandas as pd
 from langchain_core.messages import AIMessage, HumanMessage
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from src.proteinRetriverFromBM25 import retrieveRelatedProteinsFromBM25
 from src.proteinRetriverFromFTS import retrieveRelatedProteinsFTS
 from src.proteinRetriverFromFlatFiles import retrieveRelatedProteins
 from src.proteinRetriverFromSequences import retrieveRelatedProteinsFromSequences
+from src.documentDeduplicator import collapseNearDuplicates
+from src.llmResponseCache import invokeWithCache, ainvokeWithCache
+from src.requestTrace import span, runInExecutor
 
 
 FOLLOW_UPS_MARKER = "SUGGESTED_FOLLOWUPS_JSON:"
@@ -16,8 +20,14 @@ MAX_CONTEXT_TURNS = 3
 
 
 def format_documents(df):
+    def header(row):
+        members = row.get("Member IDs")
+        if isinstance(members, list) and len(members) > 1:
+            return f"Protein IDs (near-identical records): {', '.join(members)}"
+        return f"Protein ID: {row['Protein ID']}"
+
     return "\n\n".join(
-        f"Protein ID: {row['Protein ID']}\nContent: {row['Content']}"
+        f"{header(row)}\nContent: {row['Content']}"
         for _, row in df.iterrows()
     )
 
@@ -138,13 +148,18 @@ def extract_answer_and_followups(raw_output):
     return answer, suggestions[:4]
 
 
-def answerWithProteins(llm, query, sequence, top_k, chat_history=None):
+def prepareRagPrompt(query, sequence, top_k, chat_history=None, conversation_id=None, refresh_retrieval=False):
+    """
+    Run retrieval and build the chat prompt. Returns the prompt, its input
+    variables and the retrieved documents. This is the CPU/IO-bound half of
+    answerWithProteins and holds no LLM call.
+    """
     cleaned_query = (query or "").strip()
     history_messages = build_history_messages(chat_history)
 
     if sequence == '':
         documents_df = hybridRetrieveRelatedProteins(cleaned_query, top_k)
-        formatted_documents = format_documents(documents_df)
+        formatted_documents = format_documents(collapseNearDuplicates(documents_df))
         prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", """
@@ -157,6 +172,7 @@ Your task is to:
 1. Carefully read the user's **Question**.
 2. Formulate a clear and concise answer **using only the content from the provided documents**.
 3. When referencing specific information, include a citation in the format: **[Protein ID]**.
+   A document that lists several near-identical Protein IDs applies to each of them; cite every ID it lists.
 4. If the documents do not contain sufficient information to answer the question, respond using your internal knowledge and add a warning:
    **"I don't have enough information to answer this question based on the flat files. But here is an answer using my internal knowledge:"**
 
@@ -188,8 +204,10 @@ Style:
             ]
         )
     else:
-        documents_df = retrieveRelatedProteinsFromSequences(sequence, top_k)
-        formatted_documents = format_documents(documents_df)
+        documents_df = retrieveRelatedProteinsFromSequences(
+            sequence, top_k, conversation_id=conversation_id, refresh=refresh_retrieval
+        )
+        formatted_documents = format_documents(collapseNearDuplicates(documents_df))
         prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", """
@@ -206,6 +224,7 @@ Your task is to:
 1. Read the user's **Question** carefully.
 2. Generate a clear, concise, and accurate answer **using only the content from the provided documents**.
 3. When referencing information from the documents, cite the relevant **Protein ID** in this format: **[Protein ID]**.
+   A document that lists several near-identical Protein IDs applies to each of them; cite every ID it lists.
 4. If the documents do not contain sufficient information to answer the question, respond using your internal knowledge and add a warning:
    **"I don't have enough information to answer this question based on the flat files. But here is an answer using my internal knowledge:"**
 
@@ -237,14 +256,42 @@ Style:
             ]
         )
 
-    chain = prompt | llm | StrOutputParser()
-    raw_output = chain.invoke(
-        {
-            "query": cleaned_query,
-            "documents": formatted_documents,
-            "chat_history": history_messages,
-        }
+    inputs = {
+        "query": cleaned_query,
+        "documents": formatted_documents,
+        "chat_history": history_messages,
+    }
+    return prompt, inputs, documents_df
+
+
+def answerWithProteins(llm, query, sequence, top_k, chat_history=None, conversation_id=None, refresh_retrieval=False):
+    prompt, inputs, documents_df = prepareRagPrompt(
+        query, sequence, top_k, chat_history, conversation_id, refresh_retrieval
     )
+    raw_output = invokeWithCache(prompt, llm, inputs)
+    answer, suggested_followups = extract_answer_and_followups(raw_output)
+
+    protein_ids = documents_df["Protein ID"].tolist()
+    return answer, protein_ids, suggested_followups
+
+
+async def aanswerWithProteins(llm, query, sequence, top_k, chat_history=None, conversation_id=None, refresh_retrieval=False, executor=None):
+    """
+    Async variant of answerWithProteins: retrieval and embedding run on the
+    given executor, the LLM call is awaited with ainvoke.
+    """
+    loop = asyncio.get_running_loop()
+    with span("rag.retrieval", top_k=top_k, by_sequence=bool(sequence)) as attrs:
+        prompt, inputs, documents_df = await runInExecutor(
+            loop,
+            executor,
+            functools.partial(
+                prepareRagPrompt, query, sequence, top_k, chat_history, conversation_id, refresh_retrieval
+            ),
+        )
+        attrs["documents"] = len(documents_df)
+    with span("llm.generate_answer"):
+        raw_output = await ainvokeWithCache(prompt, llm, inputs)
     answer, suggested_followups = extract_answer_and_followups(raw_output)
 
     protein_ids = documents_df["Protein ID"].tolist()
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
+
+from src.promptFieldSelector import FieldIndex
+from src.solrQueryValidator import SEARCH_FIELDS_JSON, loadFieldSchema
+
+DB_PATH          = "asset/protein_index2.db"
+QUERY_FIELDS_TXT = "asset/queryfields.txt"
+SEARCH_FIELDS_SQL = "SELECT * FROM search_fields"
+RESULT_FIELDS_SQL = "SELECT * FROM result_fields"
+# stat() the sources at most this often; 0 checks on every request
+CHECK_INTERVAL   = float(os.getenv("PROMPT_SCHEMA_CHECK_SECONDS", "5"))
+
+
+class PromptSchema(NamedTuple):
+    """Everything the Solr prompt and validator need, loaded once and never mutated."""
+    searchfields: tuple
+    resultfields: tuple
+    queryfields: str
+    field_schema: MappingProxyType
+    field_index: FieldIndex
+    digest: str
+
+
+# ── module-level cache ───────────────────────────────────────────────────────
+_schema: PromptSchema | None = None
+_signature = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def _fileSignature(paths):
+    sig = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            sig.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((path, None, None))
+    return tuple(sig)
+
+
+def _load(db_path, queryfields_path, json_path):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        searchfields = tuple(conn.execute(SEARCH_FIELDS_SQL).fetchall())
+        resultfields = tuple(conn.execute(RESULT_FIELDS_SQL).fetchall())
+    finally:
+        conn.close()
+    with open(queryfields_path) as f:
+        queryfields = f.read()
+    try:
+        with open(json_path, "rb") as f:
+            jsonBytes = f.read()
+    except OSError:
+        jsonBytes = b""
+
+    digest = hashlib.sha256(
+        repr((searchfields, resultfields, queryfields)).encode("utf-8") + jsonBytes
+    ).hexdigest()
+    return searchfields, resultfields, queryfields, digest
+
+
+def getPromptSchema(db_path=DB_PATH, queryfields_path=QUERY_FIELDS_TXT, json_path=SEARCH_FIELDS_JSON):
+    """
+    Return the cached PromptSchema. The sources are re-stat'ed at most every
+    CHECK_INTERVAL seconds; on an mtime/size change they are re-read, and the
+    schema is only rebuilt when their content hash actually differs (the
+    database file also changes for unrelated writes).
+    """
+    global _schema, _signature, _last_check
+    now = time.monotonic()
+    if _schema is not None and now - _last_check < CHECK_INTERVAL:
+        return _schema
+
+    with _lock:
+        if _schema is not None and now - _last_check < CHECK_INTERVAL:
+            return _schema
+        signature = _fileSignature((db_path, queryfields_path, json_path))
+        if _schema is None or signature != _signature:
+            searchfields, resultfields, queryfields, digest = _load(db_path, queryfields_path, json_path)
+            if _schema is None or digest != _schema.digest:
+                _schema = PromptSchema(
+                    searchfields=searchfields,
+                    resultfields=resultfields,
+                    queryfields=queryfields,
+                    field_schema=MappingProxyType(loadFieldSchema(searchfields, json_path)),
+                    field_index=FieldIndex(searchfields, resultfields, json_path),
+                    digest=digest,
+                )
+                print(f"[promptSchemaCache] Loaded prompt schema "
+                      f"({len(searchfields)} search fields, {len(resultfields)} result fields, {digest[:12]})")
+            _signature = signature
+        _last_check = now
+        return _schema
@@ -0,0 +1,181 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.sqlitePool import readConnection
+
+DB_PATH = "asset/protein_index2.db"
+# stays below SQLite's default limit of 999 bound parameters
+IN_CHUNK_SIZE = 900
+
+# protein_info column -> column name used in API responses
+COLUMNS = {
+    "protein_id": "Protein ID",
+    "protein_name": "Short Name",
+    "type": "Protein Name",
+    "os": "Organism",
+    "ox": "Taxon ID",
+    "gn": "Gene Name",
+    "pe": "pe",
+    "sv": "sv",
+}
+# few distinct values; stored as int32 codes into a categories array
+DICTIONARY_COLUMNS = ("os", "pe")
+
+# columns in COLUMNS order
+PROTEIN_INFO_SQL = "SELECT protein_id, protein_name, type, os, ox, gn, pe, sv FROM protein_info"
+PROTEIN_INFO_BY_ACCESSION_SQL = PROTEIN_INFO_SQL + " WHERE protein_id IN ({})"
+ID_MAP_SQL = "SELECT index_id, protein_id FROM id_map"
+
+
+class ProteinMetadataStore:
+    """
+    protein_info held column-wise in memory. Rows are addressed by position;
+    accessions resolve through a hash index and Annoy index ids through a
+    dense index_id -> row array, so lookups are vectorized takes instead of
+    one SQLite query per protein. id_map accessions are kept per index id as
+    well, for Annoy hits whose protein is missing from protein_info.
+    """
+
+    def __init__(self, columns, index_rows, index_accessions=None):
+        self.columns = columns
+        self.size = len(columns["protein_id"])
+        self.rowByAccession = {acc: i for i, acc in enumerate(columns["protein_id"])}
+        self.rowByIndexId = index_rows
+        self.accessionByIndexId = index_accessions if index_accessions is not None else np.empty(0, dtype=object)
+
+    @classmethod
+    def from_sqlite(cls, db_path=DB_PATH):
+        with readConnection(db_path) as conn:
+            info = pd.read_sql_query(PROTEIN_INFO_SQL, conn)
+            idMap = pd.read_sql_query(ID_MAP_SQL, conn)
+
+        columns = {}
+        for name in COLUMNS:
+            if name in DICTIONARY_COLUMNS:
+                codes, categories = pd.factorize(info[name], use_na_sentinel=True)
+                columns[name] = (codes.astype(np.int32), np.asarray(categories, dtype=object))
+            else:
+                # keep SQL NULLs as None (NaN is not valid JSON)
+                values = info[name].to_numpy(dtype=object)
+                values[pd.isna(values)] = None
+                columns[name] = values
+
+        store = cls(columns, np.empty(0, dtype=np.int32))
+        indexIds = idMap["index_id"].to_numpy(dtype=np.int64)
+        rows = np.full(int(indexIds.max()) + 1 if len(indexIds) else 0, -1, dtype=np.int32)
+        rows[indexIds] = store.rowsForAccessions(idMap["protein_id"])
+        store.rowByIndexId = rows
+        accessions = np.full(len(rows), None, dtype=object)
+        accessions[indexIds] = idMap["protein_id"].to_numpy(dtype=object)
+        store.accessionByIndexId = accessions
+        return store
+
+    def rowsForAccessions(self, protein_ids):
+        """Row positions for accessions; -1 where an accession is unknown."""
+        get = self.rowByAccession.get
+        return np.fromiter((get(pid, -1) for pid in protein_ids), dtype=np.int32, count=len(protein_ids))
+
+    def rowsForIndexIds(self, index_ids):
+        """Row positions for Annoy index ids; -1 where the id is not mapped."""
+        index_ids = np.asarray(index_ids, dtype=np.int64)
+        rows = np.full(len(index_ids), -1, dtype=np.int32)
+        inRange = (index_ids >= 0) & (index_ids < len(self.rowByIndexId))
+        rows[inRange] = self.rowByIndexId[index_ids[inRange]]
+        return rows
+
+    def accessionsForIndexIds(self, index_ids):
+        """id_map accessions for Annoy index ids; None where the id is not in id_map."""
+        index_ids = np.asarray(index_ids, dtype=np.int64)
+        accessions = np.full(len(index_ids), None, dtype=object)
+        inRange = (index_ids >= 0) & (index_ids < len(self.accessionByIndexId))
+        accessions[inRange] = self.accessionByIndexId[index_ids[inRange]]
+        return accessions
+
+    def takeIndexIds(self, index_ids):
+        """
+        Metadata for Annoy index ids, in order, plus the boolean mask of the
+        ids found in id_map. Hits whose protein is missing from protein_info
+        keep their accession with empty fields, as the per-row lookups did.
+        """
+        accessions = self.accessionsForIndexIds(index_ids)
+        mapped = np.array([accession is not None for accession in accessions], dtype=bool)
+        df = self.take(self.rowsForIndexIds(index_ids)[mapped])
+        df["Protein ID"] = accessions[mapped]
+        return df, mapped
+
+    def _column(self, name, rows):
+        column = self.columns[name]
+        if name in DICTIONARY_COLUMNS:
+            codes, categories = column
+            codes = codes.take(rows)
+            values = np.full(len(rows), None, dtype=object)
+            values[codes >= 0] = categories.take(codes[codes >= 0])
+            return values
+        return column.take(rows)
+
+    def take(self, rows):
+        """
+        DataFrame with the API column names for the given row positions, in
+        order. Rows of -1 give empty strings, as the per-row lookups did.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        found = rows >= 0
+        data = {}
+        for name, label in COLUMNS.items():
+            values = np.full(len(rows), "", dtype=object)
+            values[found] = self._column(name, rows[found])
+            data[label] = values
+        return pd.DataFrame(data, dtype=object)
+
+    def lookupAccessions(self, protein_ids):
+        """Metadata for accessions; unknown ones keep their id with empty fields."""
+        protein_ids = list(protein_ids)
+        df = self.take(self.rowsForAccessions(protein_ids))
+        df["Protein ID"] = protein_ids
+        return df
+
+    def to_parquet(self, path):
+        """Export the whole table (requires pyarrow or fastparquet)."""
+        self.take(np.arange(self.size)).to_parquet(path, index=False)
+
+
+# ── module-level cache ───────────────────────────────────────────────────────
+_store: ProteinMetadataStore | None = None
+_store_lock = threading.Lock()
+
+
+def getMetadataStore(db_path=DB_PATH):
+    """Return the shared store, loading it from SQLite on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProteinMetadataStore.from_sqlite(db_path)
+                print(f"[proteinMetadataStore] Loaded {_store.size} proteins into the columnar store.")
+    return _store
+
+
+def lookupProteinInfo(protein_ids, db_path=DB_PATH):
+    """
+    Metadata for any number of accessions, in request order. Served from the
+    columnar store when it is loaded; otherwise resolved with one IN query
+    per IN_CHUNK_SIZE ids instead of one query per id.
+    """
+    protein_ids = list(protein_ids)
+    if _store is not None:
+        return _store.lookupAccessions(protein_ids)
+
+    found = {}
+    unique = list(dict.fromkeys(protein_ids))
+    with readConnection(db_path) as conn:
+        for start in range(0, len(unique), IN_CHUNK_SIZE):
+            chunk = unique[start:start + IN_CHUNK_SIZE]
+            rows = conn.execute(PROTEIN_INFO_BY_ACCESSION_SQL.format(','.join('?' * len(chunk))), chunk).fetchall()
+            for row in rows:
+                found[row[0]] = row
+
+    empty = ("",) * (len(COLUMNS) - 1)
+    records = [(pid,) + (found[pid][1:] if pid in found else empty) for pid in protein_ids]
+    return pd.DataFrame(records, columns=list(COLUMNS.values()), dtype=object)
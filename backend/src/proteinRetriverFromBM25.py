@@ -1,10 +1,12 @@
 import pickle
-import sqlite3
 import numpy as np
 from joblib import dump, load
 import os
 import pandas as pd
 
+from src.flatFileContentCache import contentForFileIds
+from src.sqlitePool import readConnection
+
 CACHE_PATH = "asset/docs_sp.joblib"
 BM25_PATH   = "asset/bm25_model_fromflatfiles.pkl"
 DB_PATH     = "asset/protein_index2.db"
@@ -22,11 +24,8 @@ def bm25_initialize():
             _, _bm25 = pickle.load(f)
 
     if _docs is None:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        cur.execute("SELECT content FROM flat_files")
-        _docs = [row[0] for row in cur.fetchall()]
-        conn.close()
+        with readConnection(DB_PATH) as conn:
+            _docs = [row[0] for row in conn.execute("SELECT flat_text(content) FROM flat_files")]
 
     if _docs_sp is None:
         if os.path.exists(CACHE_PATH):
@@ -67,23 +66,8 @@ def retrieveRelatedProteinsFromBM25(query_text, top_k):
         # return empty DataFrame if no hits
         return pd.DataFrame(columns=["Protein ID", "Content"])
 
-    placeholders = ",".join("?" for _ in file_ids)
-    sql = f"""
-        SELECT
-            ffm.protein_id   AS protein_id,
-            ff.content       AS content
-        FROM flat_files AS ff
-        JOIN flat_files_mapping AS ffm
-          ON ff.file_id = ffm.file_id
-        WHERE ff.file_id IN ({placeholders})
-    """
-
-    conn = sqlite3.connect(DB_PATH)
-    df   = pd.read_sql_query(sql, conn, params=file_ids)
-    conn.close()
-
-    return (
-        df
-        .rename(columns={"protein_id": "Protein ID", "content": "Content"})
-        .reset_index(drop=True)
-    )
\ No newline at end of file
+    rows = contentForFileIds(file_ids, DB_PATH)
+    return pd.DataFrame(
+        [(protein_id, content) for _, protein_id, content in rows],
+        columns=["Protein ID", "Content"],
+    )
@@ -4,9 +4,19 @@ import re
 from collections import defaultdict
 import spacy
 
+from src.flatFileContentCache import rememberContent
+from src.sqlitePool import readConnection
+
 # python -m spacy download en_core_web_sm)
 nlp = spacy.load("en_core_web_sm")
 
+FTS_MATCH_SQL = """
+    SELECT content
+    FROM flat_files_fts
+    WHERE flat_files_fts MATCH ?
+    LIMIT ?;
+"""
+
 SYNONYM_MAP = {
     "cofactor": ["coenzyme", "co-factor", "co enzyme"],
     "pathway": ["biopathway", "biosynthesis", "route"],
@@ -54,33 +64,30 @@ def retrieveRelatedProteinsFTS(query, top_k=10, db_path="asset/protein_index2.db
         print("No valid search terms found.")
         return pd.DataFrame(columns=["Protein ID", "Content"])
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
     score_map = defaultdict(lambda: {"content": "", "score": 0})
 
     try:
-        for base_query, expansions in subqueries:
-            # more specific (longer query) = higher weight
-            weight = 1 + 1 / max(1, len(base_query.split()))
-
-            for fts_query in expansions:
-                safe_query = sanitize_fts_term(fts_query)
-                cursor.execute("""
-                    SELECT content
-                    FROM flat_files_fts
-                    WHERE flat_files_fts MATCH ?
-                    LIMIT ?;
-                """, (safe_query, top_k))
-
-                for row in cursor.fetchall():
-                    content = row[0]
-                    match = re.search(r'^AC\s+(\w+);', content, re.MULTILINE)
-                    if match:
-                        protein_id = match.group(1)
-                        # accumulate score
-                        score_map[protein_id]["content"] = content
-                        score_map[protein_id]["score"] += weight
+        with readConnection(db_path) as conn:
+            cursor = conn.cursor()
+            for base_query, expansions in subqueries:
+                # more specific (longer query) = higher weight
+                weight = 1 + 1 / max(1, len(base_query.split()))
+
+                for fts_query in expansions:
+                    safe_query = sanitize_fts_term(fts_query)
+                    cursor.execute(FTS_MATCH_SQL, (safe_query, top_k))
+
+                    for row in cursor.fetchall():
+                        content = row[0]
+                        match = re.search(r'^AC\s+(\w+);', content, re.MULTILINE)
+                        if match:
+                            protein_id = match.group(1)
+                            # MATCH already read the record from the fts table;
+                            # keep it for the retrievers that fetch by accession
+                            rememberContent(protein_id, content)
+                            # accumulate score
+                            score_map[protein_id]["content"] = content
+                            score_map[protein_id]["score"] += weight
 
         if not score_map:
             return pd.DataFrame(columns=["Protein ID", "Content"])
@@ -95,6 +102,3 @@ def retrieveRelatedProteinsFTS(query, top_k=10, db_path="asset/protein_index2.db
     except sqlite3.Error as e:
         print(f"SQLite ERROR: {e}")
         return pd.DataFrame(columns=["Protein ID", "Content"])
-
-    finally:
-        conn.close()
@@ -1,8 +1,11 @@
-import sqlite3
+import unicodedata
+
 import pandas as pd
 from langchain_community.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from src.flatFileContentCache import contentForFileIds
+
 # module‐level cache
 _embedder: HuggingFaceEmbeddings | None = None
 _vectordb: Chroma | None = None
@@ -25,6 +28,109 @@ def load_vectorstore(chroma_dir = "asset/chroma_uniprot_nomic") -> Chroma:
         )
     return _vectordb
 
+# chunk geometry of the Chroma index (see config/implementVectorDatabaseFromFlatFiles.py)
+CHUNK_TOKENS    = 4096
+OVERLAP_TOKENS  = 512
+CHARS_PER_TOKEN = 4
+# per-record context budget; records below it are passed on whole
+PASSAGE_CHAR_BUDGET = 2 * CHUNK_TOKENS * CHARS_PER_TOKEN
+PASSAGE_SEPARATOR   = "\n[...]\n"
+
+
+PROBE_CHARS = 200
+
+
+def normalizeForMatch(text):
+    """
+    Case-folded, accent-stripped letters and digits of text, and for each the
+    index of the character of text it comes from. Chunk text was decoded by an
+    uncased BERT tokenizer (lower case, accents stripped, spaces around
+    punctuation changed), so chunks are matched on this form only.
+    """
+    chars, positions = [], []
+    for i, ch in enumerate(text):
+        for c in unicodedata.normalize("NFKD", ch.casefold()):
+            if c.isalnum():
+                chars.append(c)
+                positions.append(i)
+    return "".join(chars), positions
+
+
+def locateChunk(content, chunkText, chunkId, span=None, normalized=None):
+    """
+    Return the (start, end) character span of an indexed chunk inside the
+    stored record: the span stored with the chunk at index time when there is
+    one, else a match of the chunk on normalizeForMatch() text (pass
+    normalized=normalizeForMatch(content) when locating several chunks of one
+    record), else the position implied by the chunk geometry.
+    """
+    if span is not None:
+        start, end = span
+        start = max(0, min(start, len(content)))
+        return start, max(start, min(end, len(content)))
+
+    chunkNorm, _ = normalizeForMatch(chunkText or "")
+    if chunkNorm:
+        contentNorm, positions = normalized or normalizeForMatch(content)
+        at = contentNorm.find(chunkNorm[:PROBE_CHARS])
+        if at != -1:
+            last = min(at + len(chunkNorm), len(positions)) - 1
+            return positions[at], positions[last] + 1
+
+    chunkChars = len(chunkText) if chunkText else CHUNK_TOKENS * CHARS_PER_TOKEN
+    start = max(0, min(chunkId * (CHUNK_TOKENS - OVERLAP_TOKENS) * CHARS_PER_TOKEN, len(content)))
+    return start, min(len(content), start + chunkChars)
+
+
+def assemblePassages(content, hitChunks, budget=PASSAGE_CHAR_BUDGET):
+    """
+    Build the context for one record from its matched chunks, given as
+    (chunk text, chunk id, (char_start, char_end) or None): the hit spans
+    first (in rank order), then neighbouring text on both sides until the
+    character budget is used. Returns the passage text and the merged
+    (start, end) offsets into the stored record.
+    """
+    if len(content) <= budget or not hitChunks:
+        return content, [(0, len(content))]
+
+    spans = []
+    used = 0
+    normalized = None
+    for chunkText, chunkId, span in hitChunks:
+        if span is None and normalized is None:
+            normalized = normalizeForMatch(content)
+        start, end = locateChunk(content, chunkText, chunkId, span, normalized)
+        end = min(end, start + budget - used)
+        if end <= start:
+            break
+        spans.append([start, end])
+        used += end - start
+
+    # widen every span symmetrically with the remaining budget
+    while used < budget:
+        grown = False
+        share = max(1, (budget - used) // (2 * len(spans)))
+        for span in spans:
+            before = min(share, span[0], budget - used)
+            span[0] -= before
+            used += before
+            after = min(share, len(content) - span[1], budget - used)
+            span[1] += after
+            used += after
+            grown = grown or before > 0 or after > 0
+        if not grown:
+            break
+
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return PASSAGE_SEPARATOR.join(content[start:end] for start, end in merged), merged
+
+
 def retrieveRelatedProteins(query, top_k, db_path = "asset/protein_index2.db"):
     # get or create the shared vectorstore
     global _vectordb
@@ -34,24 +140,31 @@ def retrieveRelatedProteins(query, top_k, db_path = "asset/protein_index2.db"):
         _vectordb = load_vectorstore()
 
     docs = _vectordb.similarity_search(query, k=top_k)
-    file_ids = [doc.metadata["protein_id"] for doc in docs]
+
+    # group the hit chunks per record, keeping the rank of the first hit
+    hitsByFile = {}
+    for doc in docs:
+        fileId = doc.metadata.get("protein_id", doc.metadata.get("file_id"))
+        # indexes built before char_start/char_end were stored have no span
+        span = None
+        if "char_start" in doc.metadata and "char_end" in doc.metadata:
+            span = (int(doc.metadata["char_start"]), int(doc.metadata["char_end"]))
+        hitsByFile.setdefault(fileId, []).append(
+            (doc.page_content, int(doc.metadata.get("chunk_id", 0)), span)
+        )
+    file_ids = list(hitsByFile)
 
     if not file_ids:
-        return pd.DataFrame(columns=["Protein ID", "Content"])
-
-    placeholders = ",".join("?" for _ in file_ids)
-    sql = f"""
-      SELECT ffm.protein_id, content 
-      FROM flat_files ff 
-      JOIN flat_files_mapping ffm 
-      ON ffm.file_id = ff.file_id
-      WHERE ff.file_id IN ({placeholders});
-    """
-    conn = sqlite3.connect(db_path)
-    df   = pd.read_sql_query(sql, conn, params=file_ids)
-    conn.close()
-
-    return (
-        df.rename(columns={"protein_id": "Protein ID", "content": "Content"})
-          .reset_index(drop=True)
-    )
\ No newline at end of file
+        return pd.DataFrame(columns=["Protein ID", "Content", "Offsets"])
+
+    rows = {fileId: (protein_id, content) for fileId, protein_id, content in contentForFileIds(file_ids, db_path)}
+    records = []
+    for fileId in file_ids:
+        row = rows.get(str(fileId))
+        if row is None:
+            continue
+        protein_id, content = row
+        passage, offsets = assemblePassages(content, hitsByFile[fileId])
+        records.append({"Protein ID": protein_id, "Content": passage, "Offsets": offsets})
+
+    return pd.DataFrame(records, columns=["Protein ID", "Content", "Offsets"])
@@ -1,13 +1,17 @@
+import numpy as np
 import pandas as pd
-import sqlite3
 from annoy import AnnoyIndex
 from src.prott5Embedder import getEmbeddings
+from src.proteinMetadataStore import getMetadataStore
+from src.retrievalSessionCache import getSession, storeSession
+from src.requestTrace import span
+from src.flatFileContentCache import contentForAccessions
 
 def searchSpecificEmbedding(embedding, topK, annoydb="asset/protein_embeddings_2.ann", db_path="asset/protein_index2.db", embeddingDimension=1024):
     """
     Given a query embedding, return a DataFrame of the topK nearest
     proteins (by angular distance) from the Annoy index plus info
-    from SQLite.
+    from the in-memory protein metadata store.
     """
     # load Annoy index
     annoyIndex = AnnoyIndex(embeddingDimension, 'angular')
@@ -16,58 +20,10 @@ def searchSpecificEmbedding(embedding, topK, annoydb="asset/protein_embeddings_2
     # get the topK nearest neighbor index IDs and their distances
     neighbor_ids, distances = annoyIndex.get_nns_by_vector(embedding, topK, include_distances=True)
 
-    columns = [
-        'Protein ID', 'Short Name', 'Protein Name',
-        'Organism', 'Taxon ID', 'Gene Name', 'pe', 'sv', 'Distance'
-    ]
-    records = []
-
-    # look up each hit in the SQLite tables
-    for idx, dist in zip(neighbor_ids, distances):
-        conn = sqlite3.connect(db_path)
-
-        # map Annoy index -> protein_id
-        pid_df = pd.read_sql_query(
-            f"SELECT protein_id FROM id_map WHERE index_id = {idx}", conn
-        )
-        if pid_df.empty:
-            conn.close()
-            continue
-        pid = pid_df.iloc[0]['protein_id']
-
-        # fetch metadata
-        info_df = pd.read_sql_query(
-            f"""
-            SELECT protein_name, type, os, ox, gn, pe, sv
-            FROM protein_info
-            WHERE protein_id = '{pid}'
-            """,
-            conn
-        )
-        conn.close()
-
-        # build row
-        if not info_df.empty:
-            info = info_df.iloc[0]
-            row = {
-                'Protein ID': pid,
-                'Short Name': info['protein_name'],
-                'Protein Name': info['type'],
-                'Organism': info['os'],
-                'Taxon ID': info['ox'],
-                'Gene Name': info['gn'],
-                'pe': info['pe'],
-                'sv': info['sv'],
-                'Distance': dist
-            }
-        else:
-            row = dict.fromkeys(columns, "")
-            row['Protein ID'] = pid
-            row['Distance'] = dist
-
-        records.append(row)
-
-    result_df = pd.DataFrame(records, columns=columns)
+    # map Annoy index ids -> metadata rows in one vectorized lookup
+    store = getMetadataStore(db_path)
+    result_df, mapped = store.takeIndexIds(neighbor_ids)
+    result_df['Distance'] = np.asarray(distances, dtype=np.float64)[mapped]
     result_df = (
         result_df
         .sort_values(by="Distance", ascending=True)
@@ -77,10 +33,13 @@ def searchSpecificEmbedding(embedding, topK, annoydb="asset/protein_embeddings_2
     return result_df
 
 
-def retrieveRelatedProteinsFromSequences(sequence, topK, db_path="asset/protein_index2.db"):
+def retrieveRelatedProteinsFromSequences(sequence, topK, db_path="asset/protein_index2.db", conversation_id=None, refresh=False):
     """
     Embed a query sequence, fetch the topK most similar proteins
-    via searchSpecificEmbedding, then pull their full content.-
+    via searchSpecificEmbedding, then pull their full content.
+    With a conversation_id the embedding, ranked candidates and contents
+    are kept in the session cache, so follow-up turns on the same sequence
+    skip retrieval unless refresh is set.
     """
     # strip FASTA header if present
     raw = sequence.strip()
@@ -89,20 +48,34 @@ def retrieveRelatedProteinsFromSequences(sequence, topK, db_path="asset/protein_
     else:
         seq = raw.replace("\n", "").strip()
 
-    # get the embedding
-    embDict, _ = getEmbeddings(
-        seq_dict={"query_protein": seq},
-        visualize=True,
-        per_protein=True
-    )
-    if "query_protein" not in embDict:
-        raise ValueError(
-            f"Embedding dict missing key 'query_protein'; got {list(embDict.keys())}"
-        )
-    query_emb = embDict["query_protein"]
+    session = getSession(conversation_id, seq) if conversation_id else None
+    if session is not None and not refresh and session["top_k"] >= topK:
+        proteins = session["candidates"]["Protein ID"].head(topK).tolist()
+        contents = session["contents"]
+        # keep the Annoy rank order of the candidates, as on the miss path
+        rank = {protein: position for position, protein in enumerate(proteins)}
+        hits = contents[contents["Protein ID"].isin(proteins)]
+        return hits.iloc[hits["Protein ID"].map(rank).argsort(kind="stable")].reset_index(drop=True)
+
+    if session is not None:
+        query_emb = session["embedding"]
+    else:
+        # get the embedding
+        with span("embedding", length=len(seq)):
+            embDict, _ = getEmbeddings(
+                seq_dict={"query_protein": seq},
+                visualize=True,
+                per_protein=True
+            )
+        if "query_protein" not in embDict:
+            raise ValueError(
+                f"Embedding dict missing key 'query_protein'; got {list(embDict.keys())}"
+            )
+        query_emb = embDict["query_protein"]
 
     # retrieve topK similar proteins (metadata + similarity)
-    sim_df = searchSpecificEmbedding(query_emb, topK=topK)
+    with span("vector.search", top_k=topK):
+        sim_df = searchSpecificEmbedding(query_emb, topK=topK)
 
     # extract just the IDs
     proteins = sim_df["Protein ID"].tolist()
@@ -110,20 +83,8 @@ def retrieveRelatedProteinsFromSequences(sequence, topK, db_path="asset/protein_
         # no hits -> empty result
         return pd.DataFrame(columns=["Protein ID", "Content"])
 
-    # query the content table for these proteins
-    conn = sqlite3.connect(db_path)
-    ph = ",".join("?" for _ in proteins)
-    sql = f"""
-        SELECT m.protein_id, f.content
-        FROM flat_files f
-        JOIN flat_files_mapping m ON f.file_id = m.file_id
-        WHERE m.protein_id IN ({ph})
-    """
-    content_df = pd.read_sql_query(sql, conn, params=proteins)
-    conn.close()
-
-    return (
-        content_df
-        .rename(columns={"protein_id": "Protein ID", "content": "Content"})
-        .reset_index(drop=True)
-    )
+    # full records, from the hot-record cache where possible
+    content_df = pd.DataFrame(contentForAccessions(proteins, db_path), columns=["Protein ID", "Content"])
+    if conversation_id:
+        storeSession(conversation_id, seq, topK, query_emb, sim_df, content_df)
+    return content_df
@@ -1,59 +1,55 @@
-import sqlite3
 import pandas as pd
 from scipy.stats import hypergeom
 
-def findRelatedGoIds(genesOfInterest, dbPath='asset/protein_index2.db'):
-    conn = sqlite3.connect(dbPath)
-    cursor = conn.cursor()
+from src.sqlitePool import readConnection
+
+DISTINCT_PROTEIN_COUNT_SQL = "SELECT COUNT(DISTINCT protein_id) FROM protein_go_mapping"
+# go_ids, concatenated protein_ids, and their counts for the proteins in genesOfInterest,
+# with the background count and GO info joined in (one query instead of two lookups per GO term)
+GO_ENRICHMENT_SQL = """
+SELECT g.go_id, GROUP_CONCAT(g.protein_id, ', ') AS protein_ids, COUNT(g.protein_id) AS count_in_interest,
+       b.background_distribution, i.go_name, i.namespace, i.def, i.is_a
+FROM protein_go_mapping g
+LEFT JOIN background_distribution_count b ON b.go_id = g.go_id
+LEFT JOIN go_info i ON i.go_id = g.go_id
+WHERE g.protein_id IN ({})
+GROUP BY g.go_id
+"""
+
+# COUNT(DISTINCT protein_id) walks the whole mapping table; the database does
+# not change while the server runs, so it is computed once per file
+_distinctProteinCounts = {}
 
-    cursor.execute("SELECT COUNT(DISTINCT protein_id) FROM protein_go_mapping")
-    distinctProteinCount = cursor.fetchone()[0]
 
-    # fetching go_ids, concatenated protein_ids, and their counts for the proteins in genesOfInterest
-    query = """
-    SELECT go_id, GROUP_CONCAT(protein_id, ', ') AS protein_ids, COUNT(protein_id) AS count_in_interest
-    FROM protein_go_mapping
-    WHERE protein_id IN ({})
-    GROUP BY go_id
-    """.format(','.join('?' for _ in genesOfInterest))  # parameterized query to avoid SQL injection
+def distinctAnnotatedProteinCount(conn, dbPath):
+    if dbPath not in _distinctProteinCounts:
+        _distinctProteinCounts[dbPath] = conn.execute(DISTINCT_PROTEIN_COUNT_SQL).fetchone()[0]
+    return _distinctProteinCounts[dbPath]
 
-    cursor.execute(query, genesOfInterest)
-    results = cursor.fetchall()
+
+def findRelatedGoIds(genesOfInterest, dbPath='asset/protein_index2.db'):
+    query = GO_ENRICHMENT_SQL.format(','.join('?' for _ in genesOfInterest))  # parameterized query to avoid SQL injection
+
+    with readConnection(dbPath) as conn:
+        distinctProteinCount = distinctAnnotatedProteinCount(conn, dbPath)
+        results = conn.execute(query, genesOfInterest).fetchall()
 
     records = []
 
-    for goId, protein_ids, countInInterest in results:
-        cursor.execute("""
-        SELECT background_distribution
-        FROM background_distribution_count
-        WHERE go_id = ?
-        """, (goId,))
-        background = cursor.fetchone()
-        
-        if background and background[0] != 0:
-            enrichmentScore = round((countInInterest / len(genesOfInterest)) / (background[0] / distinctProteinCount), 3)
-            
+    for goId, protein_ids, countInInterest, background, goName, namespace, goDef, isA in results:
+        if background:
+            enrichmentScore = round((countInInterest / len(genesOfInterest)) / (background / distinctProteinCount), 3)
+
             # constant values to calculate pValue
             # N = distinctProteinCount
-            # M = background[0]               -> proteins annotated to this GO term
+            # M = background                  -> proteins annotated to this GO term
             # n = len(genesOfInterest)
             # m = countInInterest
-            
+
             # scipy hypergeom.sf(m-1, N, M, n) = sum_{k=m}^... P(X=k)
-            pValue = hypergeom.sf(countInInterest - 1, distinctProteinCount, background[0], len(genesOfInterest))
+            pValue = hypergeom.sf(countInInterest - 1, distinctProteinCount, background, len(genesOfInterest))
             pValue = round(pValue, 5)
 
-            cursor.execute("""
-            SELECT go_name, namespace, def, is_a
-            FROM go_info
-            WHERE go_id = ?
-            """, (goId,))
-            goInfo = cursor.fetchone()
-            if goInfo:
-                goName, namespace, goDef, isA = goInfo
-            else:
-                goName, namespace, goDef, isA = None, None, None, None
-
             records.append({
                 'GO ID': goId,
                 'Enrichment Score': enrichmentScore,
@@ -68,5 +64,4 @@ def findRelatedGoIds(genesOfInterest, dbPath='asset/protein_index2.db'):
     records.sort(key=lambda r: r['Enrichment Score'], reverse=True)
     df = pd.DataFrame(records)
 
-    conn.close()
-    return df
\ No newline at end of file
+    return df
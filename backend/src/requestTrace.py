@@ -0,0 +1,138 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+MAX_LOG_LINES = int(os.getenv("REQUEST_LOG_LINES", "500"))
+MAX_SPANS     = int(os.getenv("REQUEST_MAX_SPANS", "200"))
+# one JSON line per finished request is appended here when set
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+_current_span  = contextvars.ContextVar("request_span", default=None)
+_export_lock = threading.Lock()
+
+
+class RequestTrace:
+    """Log lines and timed spans of a single request, both bounded."""
+
+    def __init__(self, name, verbose=False):
+        self.request_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.verbose = verbose
+        self.start = time.time()
+        self.logs = deque(maxlen=MAX_LOG_LINES)
+        self.spans = deque(maxlen=MAX_SPANS)
+        self._lock = threading.Lock()
+
+    def addLog(self, line):
+        with self._lock:
+            self.logs.append(line)
+
+    def addSpan(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def logText(self):
+        with self._lock:
+            return "\n".join(self.logs) + ("\n" if self.logs else "")
+
+    def spanList(self):
+        with self._lock:
+            return sorted(self.spans, key=lambda s: s["start_ms"])
+
+    def toDict(self):
+        return {
+            "request_id": self.request_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round((time.time() - self.start) * 1000, 2),
+            "spans": self.spanList(),
+        }
+
+
+class TraceLogHandler(logging.Handler):
+    """Route log records into the trace of the request that emitted them; records outside a request are dropped."""
+
+    def emit(self, record):
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        try:
+            trace.addLog(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def startTrace(name, verbose=False):
+    """Open a trace for the current request; pass the returned token to endTrace."""
+    trace = RequestTrace(name, verbose)
+    return trace, _current_trace.set(trace)
+
+
+def endTrace(token):
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if trace is not None and TRACE_EXPORT_PATH:
+        _export(trace)
+    return trace
+
+
+def currentTrace():
+    return _current_trace.get()
+
+
+def _export(trace):
+    line = json.dumps(trace.toDict(), default=str)
+    try:
+        with _export_lock, open(TRACE_EXPORT_PATH, "a") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"[requestTrace] Could not export trace to {TRACE_EXPORT_PATH}: {e}")
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block of work as a span of the current request trace. Spans
+    opened inside another span record it as their parent. Outside a
+    request this is a no-op.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attributes
+        return
+
+    span_id = uuid.uuid4().hex[:8]
+    token = _current_span.set(span_id)
+    start = time.time()
+    status, error = "ok", None
+    try:
+        yield attributes
+    except BaseException as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.addSpan({
+            "span_id": span_id,
+            "parent_id": _current_span.get(),
+            "name": name,
+            "start_ms": round((start - trace.start) * 1000, 2),
+            "duration_ms": round((time.time() - start) * 1000, 2),
+            "status": status,
+            "error": error,
+            "attributes": attributes,
+        })
+
+
+def runInExecutor(loop, executor, fn, *args):
+    """loop.run_in_executor that keeps the request's trace context in the worker thread."""
+    ctx = contextvars.copy_context()
+    return loop.run_in_executor(executor, functools.partial(ctx.run, fn, *args))
@@ -0,0 +1,84 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# a chat thread is considered idle after this long and its retrieval is dropped
+SESSION_TTL_SECONDS = 30 * 60
+# upper bound for everything held by the cache (embeddings + fetched contents)
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# (conversation_id, sequence hash) -> entry, kept in least-recently-used order
+_sessions: "OrderedDict[tuple[str, str], dict]" = OrderedDict()
+_sessions_bytes = 0
+_sessions_lock = threading.Lock()
+
+
+def sequenceHash(sequence):
+    return hashlib.sha256(sequence.encode("utf-8")).hexdigest()
+
+
+def _entrySize(embedding, candidates, contents):
+    size = getattr(embedding, "nbytes", 0)
+    size += int(candidates.memory_usage(deep=True).sum())
+    size += int(contents.memory_usage(deep=True).sum())
+    return size
+
+
+def _drop(key):
+    global _sessions_bytes
+    entry = _sessions.pop(key)
+    _sessions_bytes -= entry["size"]
+
+
+def _evict(now):
+    for key in [k for k, entry in _sessions.items() if entry["expires"] <= now]:
+        _drop(key)
+    while _sessions and _sessions_bytes > MAX_CACHE_BYTES:
+        _drop(next(iter(_sessions)))
+
+
+def getSession(conversation_id, sequence):
+    """
+    Return the cached retrieval of a conversation for this sequence, or None.
+    The entry holds 'embedding', 'candidates' (ranked similarity DataFrame),
+    'contents' (Protein ID / Content DataFrame) and 'top_k'.
+    """
+    key = (conversation_id, sequenceHash(sequence))
+    now = time.time()
+    with _sessions_lock:
+        _evict(now)
+        entry = _sessions.get(key)
+        if entry is None:
+            return None
+        entry["expires"] = now + SESSION_TTL_SECONDS
+        _sessions.move_to_end(key)
+        return entry
+
+
+def storeSession(conversation_id, sequence, top_k, embedding, candidates, contents):
+    global _sessions_bytes
+    key = (conversation_id, sequenceHash(sequence))
+    size = _entrySize(embedding, candidates, contents)
+    if size > MAX_CACHE_BYTES:
+        return
+
+    with _sessions_lock:
+        if key in _sessions:
+            _drop(key)
+        _sessions[key] = {
+            "top_k": top_k,
+            "embedding": embedding,
+            "candidates": candidates,
+            "contents": contents,
+            "size": size,
+            "expires": time.time() + SESSION_TTL_SECONDS,
+        }
+        _sessions_bytes += size
+        _evict(time.time())
+
+
+def dropConversation(conversation_id):
+    with _sessions_lock:
+        for key in [k for k in _sessions if k[0] == conversation_id]:
+            _drop(key)
@@ -0,0 +1,328 @@
+import difflib
+import json
+import re
+
+SEARCH_FIELDS_JSON = "asset/search-fields.json"
+
+# valid UniProt fields that only appear in queryfields.txt, not in search-fields.json
+EXTRA_FIELDS = {
+    "organism_id": ("integer", "general", r"^\d+$"),
+    "taxonomy_id": ("integer", "general", r"^\d+$"),
+    "virus_host_id": ("integer", "general", r"^\d+$"),
+    "gene_exact": ("string", "general", None),
+    "sec_acc": ("string", "general", None),
+    "accession_id": ("string", "general", None),
+    "is_isoform": ("boolean", "general", r"^(true|false)$"),
+    "annotation_score": ("integer", "general", r"^[1-5]$"),
+    "sequence": ("string", "general", None),
+}
+
+# names LLMs commonly invent for existing fields
+FIELD_ALIASES = {
+    "organism": "organism_name",
+    "species": "organism_name",
+    "taxonomy": "taxonomy_name",
+    "taxon": "taxonomy_name",
+    "taxon_id": "taxonomy_id",
+    "gene_name": "gene",
+    "protein": "protein_name",
+    "name": "protein_name",
+    "kw": "keyword",
+    "keywords": "keyword",
+    "go_term": "go",
+    "pathway": "cc_pathway",
+    "function": "cc_function",
+    "subcellular_location": "cc_scl_term",
+    "disease": "cc_disease",
+    "domain": "ft_domain",
+    "ec_number": "ec",
+    "molecular_weight": "mass",
+    "sequence_length": "length",
+}
+
+OPERATORS = {"AND", "OR", "NOT"}
+
+
+class SolrQueryError(ValueError):
+    pass
+
+
+def loadFieldSchema(searchFields=(), jsonPath=SEARCH_FIELDS_JSON):
+    """
+    Build {term: (dataType, fieldType, regex)} from the search_fields rows
+    (id, label, itemType, term, dataType, fieldType, example, regex) plus the
+    nested sibling terms of search-fields.json, which the table does not hold.
+    """
+    schema = dict(EXTRA_FIELDS)
+
+    def walk(entries):
+        for entry in entries:
+            if entry.get("term"):
+                schema[entry["term"]] = (entry.get("dataType"), entry.get("fieldType"), entry.get("regex"))
+            walk(entry.get("items", []))
+            walk(entry.get("siblings", []))
+
+    try:
+        with open(jsonPath) as f:
+            walk(json.load(f))
+    except OSError:
+        pass
+
+    for row in searchFields:
+        term, dataType, fieldType, regex = row[3], row[4], row[5], row[7]
+        if term:
+            schema[term] = (dataType, fieldType, regex)
+    return schema
+
+
+# ── tokenizer ────────────────────────────────────────────────────────────────
+def _tokenize(query):
+    tokens = []
+    i, n = 0, len(query)
+    while i < n:
+        ch = query[i]
+        if ch.isspace():
+            i += 1
+        elif ch in "()":
+            tokens.append((ch, ch))
+            i += 1
+        elif ch == '"':
+            end = i + 1
+            while end < n and query[end] != '"':
+                end += 2 if query[end] == "\\" else 1
+            if end >= n:
+                raise SolrQueryError("Unbalanced quote")
+            tokens.append(("PHRASE", query[i:end + 1]))
+            i = end + 1
+        elif ch in "[{":
+            end = i + 1
+            while end < n and query[end] not in "]}":
+                end += 1
+            if end >= n:
+                raise SolrQueryError("Unclosed range")
+            tokens.append(("RANGE", query[i:end + 1]))
+            i = end + 1
+        else:
+            match = re.match(r"[^\s()\"\[\]{}]+", query[i:])
+            if match is None:
+                raise SolrQueryError(f"Unexpected {ch!r} at position {i}")
+            word = match.group(0)
+            field = re.match(r"([A-Za-z_][\w]*):(.*)", word)
+            if field:
+                tokens.append(("FIELD", field.group(1)))
+                i += len(field.group(1)) + 1
+                if field.group(2):
+                    tokens.append(("WORD", field.group(2)))
+                    i += len(field.group(2))
+            else:
+                tokens.append(("OP" if word.upper() in OPERATORS and word.isupper() else "WORD", word))
+                i += len(word)
+    return tokens
+
+
+# ── parser (produces a small AST) ────────────────────────────────────────────
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.orExpr()
+        if self.pos != len(self.tokens):
+            raise SolrQueryError(f"Unexpected token {self.peek()[1]!r}")
+        return node
+
+    def orExpr(self):
+        parts = [self.andExpr()]
+        while self.peek() == ("OP", "OR"):
+            self.take()
+            parts.append(self.andExpr())
+        return parts[0] if len(parts) == 1 else ("OR", parts)
+
+    def andExpr(self):
+        parts = [self.unary()]
+        while self.peek()[0] not in (None, ")") and self.peek() != ("OP", "OR"):
+            if self.peek() == ("OP", "AND"):
+                self.take()
+            parts.append(self.unary())
+        return parts[0] if len(parts) == 1 else ("AND", parts)
+
+    def unary(self):
+        if self.peek() == ("OP", "NOT"):
+            self.take()
+            return ("NOT", self.unary())
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "(":
+            node = self.orExpr()
+            if self.take()[0] != ")":
+                raise SolrQueryError("Unbalanced parenthesis")
+            return ("GROUP", node)
+        if kind == "FIELD":
+            nextKind, _ = self.peek()
+            if nextKind == "(":
+                self.take()
+                node = self.orExpr()
+                if self.take()[0] != ")":
+                    raise SolrQueryError("Unbalanced parenthesis")
+                return ("FIELD", value, ("GROUP", node))
+            if nextKind in ("WORD", "PHRASE", "RANGE"):
+                return ("FIELD", value, ("TERM", self.take()[1]))
+            raise SolrQueryError(f"Missing value for field {value!r}")
+        if kind in ("WORD", "PHRASE", "RANGE"):
+            return ("TERM", value)
+        raise SolrQueryError(f"Unexpected token {value!r}" if value else "Unexpected end of query")
+
+
+# ── validation / repair ──────────────────────────────────────────────────────
+def _normalizeRange(field, value, dataType, fixes):
+    comparison = re.fullmatch(r"(>=|<=|>|<)\s*(\d+)", value)
+    if comparison and dataType == "integer":
+        op, number = comparison.group(1), int(comparison.group(2))
+        low, high = {
+            ">": (number + 1, "*"), ">=": (number, "*"),
+            "<": ("*", number - 1), "<=": ("*", number),
+        }[op]
+        fixes.append(f"{field}:{value} -> [{low} TO {high}]")
+        return f"[{low} TO {high}]"
+
+    match = re.fullmatch(r"([\[{])\s*(\S+)\s+(?:TO|to)\s+(\S+)\s*([\]}])", value)
+    if not match:
+        match = re.fullmatch(r"([\[{])\s*(\d+)\s*-\s*(\d+)\s*([\]}])", value)
+    if not match:
+        raise SolrQueryError(f"Malformed range {value!r} for field {field!r}")
+    openBr, low, high, closeBr = match.groups()
+
+    if dataType == "integer":
+        for bound in (low, high):
+            if bound != "*" and not re.fullmatch(r"\d+", bound):
+                raise SolrQueryError(f"Range bound {bound!r} is not an integer for field {field!r}")
+        if low != "*" and high != "*" and int(low) > int(high):
+            low, high = high, low
+    elif dataType == "date":
+        for bound in (low, high):
+            if bound != "*" and not re.fullmatch(r"\d{4}-\d{2}-\d{2}", bound):
+                raise SolrQueryError(f"Range bound {bound!r} is not a YYYY-MM-DD date for field {field!r}")
+
+    normalized = f"{openBr}{low} TO {high}{closeBr}"
+    if normalized != value:
+        fixes.append(f"{field}:{value} -> {normalized}")
+    return normalized
+
+
+def _checkValue(field, value, schema, fixes):
+    dataType, fieldType, regex = schema[field]
+    if value.startswith(("[", "{")) or re.match(r"(>=|<=|>|<)", value):
+        if fieldType != "range" and dataType not in ("integer", "date"):
+            raise SolrQueryError(f"Field {field!r} does not support ranges")
+        return _normalizeRange(field, value, dataType, fixes)
+
+    if dataType == "boolean":
+        if value.lower() not in ("true", "false"):
+            raise SolrQueryError(f"Field {field!r} expects true or false, got {value!r}")
+        return value.lower()
+
+    if regex and "*" not in value and "?" not in value and not value.startswith('"'):
+        if not re.search(regex, value):
+            raise SolrQueryError(f"Value {value!r} does not match the format of field {field!r}")
+    return value
+
+
+def _resolveField(field, value, schema, fixes):
+    """
+    Map a field name to a valid one, returning (field, value). field is None
+    when the clause has to become a plain full-text term.
+    """
+    if field in schema and field != "id":
+        return field, value
+    if field.lower() in schema and field.lower() != "id":
+        fixes.append(f"{field} -> {field.lower()}")
+        return field.lower(), value
+
+    lowered = field.lower()
+    if lowered.startswith(("xref_count_", "xrefcount_")):
+        return lowered, value
+    if lowered.startswith("xref_"):
+        database = lowered[len("xref_"):]
+        fixed = f"{database}-{value}" if not value.startswith(('"', "(")) else value
+        fixes.append(f"{field}:{value} -> xref:{fixed}")
+        return "xref", fixed
+    if lowered == "id":
+        accessionRegex = schema.get("accession", (None, None, None))[2]
+        if accessionRegex and re.fullmatch(accessionRegex, value):
+            fixes.append(f"id:{value} -> accession:{value}")
+            return "accession", value
+        fixes.append(f"id:{value} -> {value}")
+        return None, value
+    if lowered in FIELD_ALIASES and FIELD_ALIASES[lowered] in schema:
+        fixes.append(f"{field} -> {FIELD_ALIASES[lowered]}")
+        return FIELD_ALIASES[lowered], value
+
+    close = difflib.get_close_matches(lowered, [t for t in schema if t != "id"], n=1, cutoff=0.85)
+    if close:
+        fixes.append(f"{field} -> {close[0]}")
+        return close[0], value
+    raise SolrQueryError(f"Unknown search field {field!r}")
+
+
+def _render(node, schema, fixes, field=None):
+    kind = node[0]
+    if kind == "OR":
+        return " OR ".join(_render(part, schema, fixes, field) for part in node[1])
+    if kind == "AND":
+        return " AND ".join(_render(part, schema, fixes, field) for part in node[1])
+    if kind == "NOT":
+        return f"NOT {_render(node[1], schema, fixes, field)}"
+    if kind == "GROUP":
+        return f"({_render(node[1], schema, fixes, field)})"
+    if kind == "FIELD":
+        name, value = node[1], node[2]
+        if value[0] == "GROUP":
+            resolved, _ = _resolveField(name, "", schema, fixes)
+            if resolved is None or resolved == "xref" and name.lower().startswith("xref_"):
+                raise SolrQueryError(f"Cannot repair grouped values for field {name!r}")
+            return f"{resolved}:{_render(value, schema, fixes, resolved)}"
+        resolved, text = _resolveField(name, value[1], schema, fixes)
+        if resolved is None:
+            return text
+        return f"{resolved}:{_checkValue(resolved, text, schema, fixes)}"
+    # TERM
+    if field is not None:
+        return _checkValue(field, node[1], schema, fixes)
+    return node[1]
+
+
+def parseSolrQuery(query):
+    """
+    Parse a UniProt Solr query into a nested tuple AST:
+    ("OR", [nodes]), ("AND", [nodes]), ("NOT", node), ("GROUP", node),
+    ("FIELD", name, node) and ("TERM", text).
+    """
+    text = (query or "").strip()
+    text = re.sub(r"^```[\w]*\s*|\s*```$", "", text).strip().strip("`").strip()
+    if not text:
+        raise SolrQueryError("Empty query")
+    return _Parser(_tokenize(text)).parse()
+
+
+def repairSolrQuery(query, schema):
+    """
+    Parse a generated UniProt Solr query, check every field against the
+    schema and rewrite what can be fixed locally (xref_* fields, the id
+    field, misspelled/aliased fields, comparison and malformed ranges,
+    stray code fences). Returns (query, fixes); raises SolrQueryError when
+    the query cannot be repaired, so no request is sent to UniProt.
+    """
+    fixes = []
+    ast = parseSolrQuery(query)
+    return _render(ast, schema, fixes), fixes
@@ -0,0 +1,94 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+CACHE_DB_PATH = os.getenv("SOLR_TRANSLATION_CACHE_PATH", "asset/solr_translation_cache.db")
+CACHE_ENABLED = os.getenv("SOLR_TRANSLATION_CACHE", "1").lower() not in ("0", "false", "no")
+
+STOPWORDS = {
+    'what', 'which', 'who', 'are', 'is', 'the', 'of', 'in', 'on', 'to', 'there', 'those', 'this', 'these',
+    'a', 'an', 'do', 'does', 'can', 'could', 'should', 'would', 'please', 'just', 'me', 'give', 'show',
+    'list', 'find', 'get', 'all', 'any', 'some', 'i', 'want', 'need', 'tell', 'about', 'for', 'that', 'be',
+}
+
+_lock = threading.Lock()
+_initialized = False
+_stats = {"hits": 0, "misses": 0, "stale": 0}
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(CACHE_DB_PATH, timeout=10)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS solr_translation_cache (
+                question TEXT,
+                model TEXT,
+                solr_query TEXT,
+                has_results INTEGER,
+                updated REAL,
+                PRIMARY KEY (question, model)
+            )
+        """)
+        conn.commit()
+        _initialized = True
+    return conn
+
+
+def normalizeQuestion(question):
+    """Lower-case, drop punctuation and stopwords, collapse whitespace."""
+    words = re.findall(r"[\w.:+-]+", (question or "").lower())
+    return " ".join(w.strip(".:") for w in words if w.strip(".:") and w.strip(".:") not in STOPWORDS)
+
+
+def lookupTranslation(question, model):
+    """Return a cached Solr query that previously returned results, or None."""
+    if not CACHE_ENABLED:
+        return None
+    with _lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT solr_query FROM solr_translation_cache WHERE question = ? AND model = ? AND has_results = 1",
+            (normalizeQuestion(question), model),
+        ).fetchone()
+        conn.close()
+        _stats["misses" if row is None else "hits"] += 1
+    return None if row is None else row[0]
+
+
+def storeTranslation(question, model, solr_query, has_results):
+    if not CACHE_ENABLED or not solr_query:
+        return
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO solr_translation_cache VALUES (?, ?, ?, ?, ?)",
+            (normalizeQuestion(question), model, solr_query, int(bool(has_results)), time.time()),
+        )
+        conn.commit()
+        conn.close()
+
+
+def markStale(question, model):
+    """A served translation no longer returns results; stop serving it."""
+    with _lock:
+        _stats["stale"] += 1
+        conn = _connect()
+        conn.execute(
+            "UPDATE solr_translation_cache SET has_results = 0, updated = ? WHERE question = ? AND model = ?",
+            (time.time(), normalizeQuestion(question), model),
+        )
+        conn.commit()
+        conn.close()
+
+
+def translationStats():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
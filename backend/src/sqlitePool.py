@@ -0,0 +1,162 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from src.flatFileCodec import registerDecoder
+
+DB_PATH = "asset/protein_index2.db"
+# flat_files / flat_files_fts, split off by config/splitDatabase.py; attached
+# as schema "content" when present, so unqualified table names still resolve
+CONTENT_DB_PATH = os.getenv("CONTENT_DB_PATH", "asset/protein_content.db")
+
+POOL_SIZE          = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+MMAP_BYTES         = int(os.getenv("SQLITE_MMAP_BYTES", str(1 << 30)))
+CACHE_KIB          = int(os.getenv("SQLITE_CACHE_KIB", str(64 * 1024)))
+STATEMENT_CACHE    = 256
+# with a separate content file, the metadata file gets a page cache large
+# enough to hold it entirely, and content scans get a small cache of their own
+# so they cannot evict metadata pages
+METADATA_CACHE_MAX_KIB = int(os.getenv("SQLITE_METADATA_CACHE_MAX_KIB", str(512 * 1024)))
+CONTENT_CACHE_KIB      = int(os.getenv("SQLITE_CONTENT_CACHE_KIB", str(8 * 1024)))
+CONTENT_MMAP_BYTES     = int(os.getenv("SQLITE_CONTENT_MMAP_BYTES", "0"))
+# the protein database is a build artifact and never written while serving;
+# immutable=1 lets SQLite skip file locking and change detection entirely
+IMMUTABLE          = os.getenv("SQLITE_IMMUTABLE", "1").lower() not in ("0", "false", "no")
+
+
+class ReadOnlyPool:
+    """
+    Fixed-size pool of read-only connections to one database file.
+    Connections are created lazily up to `size` and handed out one
+    thread at a time; each keeps its own prepared-statement cache.
+    """
+
+    def __init__(self, db_path, size=POOL_SIZE, attach=None):
+        self.db_path = db_path
+        self.size = size
+        self.attach = attach or {}
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self.stats = {"borrows": 0, "queries": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0, "connections": 0}
+
+    def _open(self):
+        conn = sqlite3.connect(_uri(self.db_path), uri=True, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+        if self.attach:
+            fileKib = os.path.getsize(self.db_path) // 1024 + 1
+            conn.execute(f"PRAGMA main.mmap_size = {max(MMAP_BYTES, fileKib * 1024)}")
+            conn.execute(f"PRAGMA main.cache_size = -{min(fileKib, METADATA_CACHE_MAX_KIB)}")
+            for alias, path in self.attach.items():
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (_uri(path),))
+                conn.execute(f"PRAGMA {alias}.mmap_size = {CONTENT_MMAP_BYTES}")
+                conn.execute(f"PRAGMA {alias}.cache_size = -{CONTENT_CACHE_KIB}")
+        else:
+            conn.execute(f"PRAGMA mmap_size = {MMAP_BYTES}")
+            conn.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA query_only = 1")
+        # flat_text(content) decodes plain or zstd-compressed flat_files rows
+        registerDecoder(conn)
+        conn.set_trace_callback(self._countStatement)
+        return conn
+
+    def _countStatement(self, _statement):
+        with self._lock:
+            self.stats["queries"] += 1
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool when the block exits."""
+        start = time.perf_counter()
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    self.stats["connections"] = self._created
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                        self.stats["connections"] = self._created
+                    raise
+            else:
+                conn = self._idle.get()
+
+        waited = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.stats["borrows"] += 1
+            self.stats["wait_ms_total"] += waited
+            self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], waited)
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def statsDict(self):
+        with self._lock:
+            borrows = self.stats["borrows"]
+            return {
+                **self.stats,
+                "db_path": self.db_path,
+                "attached": dict(self.attach),
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "wait_ms_avg": round(self.stats["wait_ms_total"] / borrows, 3) if borrows else 0.0,
+            }
+
+
+def _uri(path):
+    return f"file:{path}?mode=ro" + ("&immutable=1" if IMMUTABLE else "")
+
+
+# ── module-level cache ───────────────────────────────────────────────────────
+_pools: dict[str, ReadOnlyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def getPool(db_path=DB_PATH):
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            if db_path not in _pools:
+                attach = None
+                if os.path.exists(CONTENT_DB_PATH) and os.path.abspath(CONTENT_DB_PATH) != os.path.abspath(db_path):
+                    attach = {"content": CONTENT_DB_PATH}
+                _pools[db_path] = ReadOnlyPool(db_path, attach=attach)
+            pool = _pools[db_path]
+    return pool
+
+
+def readConnection(db_path=DB_PATH):
+    """`with readConnection(path) as conn:` borrows a pooled read-only connection."""
+    return getPool(db_path).connection()
+
+
+def poolStats():
+    return {path: pool.statsDict() for path, pool in list(_pools.items())}
+
+
+def fullScans(conn, sql, params=()):
+    """
+    Tables (or aliases) a statement would read in full, from EXPLAIN QUERY
+    PLAN; fts5 MATCH lookups show up as scans of the virtual table's own
+    index and are not counted.
+    """
+    scans = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+        match = re.match(r"SCAN (?:TABLE )?(\S+)", row[3])
+        if match and "VIRTUAL TABLE INDEX" not in row[3]:
+            scans.append(match.group(1))
+    return scans
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SEARCH_URL    = "https://rest.uniprot.org/uniprotkb/search"
+MAX_PAGE_SIZE = 500          # largest page rest.uniprot.org serves
+MAX_RETRIES   = 5
+BACKOFF_BASE  = 0.5          # seconds, doubled per retry, with full jitter
+BACKOFF_CAP   = 30.0
+RETRY_STATUS  = {429, 500, 502, 503, 504}
+TIMEOUT       = 30
+
+# ── module-level cache ───────────────────────────────────────────────────────
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="uniprot-prefetch")
+
+
+def get_session() -> requests.Session:
+    """
+    Return the shared keep-alive session (created once), so repeated calls
+    reuse pooled TCP/TLS connections to rest.uniprot.org.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Accept": "application/json",
+                    "Accept-Encoding": "gzip, deflate",
+                })
+                _session = session
+    return _session
+
+
+def _retry_delay(attempt, response=None):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(BACKOFF_CAP, float(retry_after))
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _get(url, params=None, headers=None):
+    """GET with exponential back-off + jitter on 429/5xx and connection errors."""
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(_retry_delay(attempt))
+            continue
+        if response.status_code in RETRY_STATUS and attempt < MAX_RETRIES:
+            time.sleep(_retry_delay(attempt, response))
+            continue
+        response.raise_for_status()
+        return response
+
+
+def search_params(solr_query, limit, fields=None):
+    params = {
+        "query": solr_query,
+        "format": "json",
+        "size": max(1, min(limit, MAX_PAGE_SIZE)),
+    }
+    if fields:
+        params["fields"] = fields if isinstance(fields, str) else ",".join(fields)
+    return params
+
+
+def fetch_first_page(solr_query, limit, fields=None, headers=None, base_url=SEARCH_URL):
+    """Request only the first page; used for conditional revalidation."""
+    return _get(base_url, search_params(solr_query, limit, fields), headers=headers)
+
+
+def iter_uniprot_pages(solr_query, limit, fields=None, prefetch=False, base_url=SEARCH_URL, first_response=None):
+    """
+    Yield result pages (lists of entries) for a Solr query, following the
+    cursor in the Link: rel="next" header until limit entries were returned.
+    With prefetch the next page is requested while the caller consumes the
+    current one (cursor pagination cannot be fetched out of order).
+    first_response lets a caller that already fetched page one continue from it.
+    """
+    remaining = limit
+    response = first_response if first_response is not None else _get(base_url, search_params(solr_query, limit, fields))
+    pending = None
+    while True:
+        next_url = response.links.get("next", {}).get("url")
+        page = response.json().get("results", [])[:remaining]
+        remaining -= len(page)
+
+        if prefetch and next_url and remaining > 0:
+            pending = _prefetch_executor.submit(_get, next_url)
+        if page:
+            yield page
+        if not next_url or remaining <= 0:
+            return
+        response = pending.result() if prefetch else _get(next_url)
+
+
+def iter_uniprot_results(solr_query, limit, fields=None, prefetch=False, base_url=SEARCH_URL, first_response=None):
+    """Stream individual UniProt entries for a Solr query."""
+    for page in iter_uniprot_pages(solr_query, limit, fields, prefetch, base_url, first_response):
+        yield from page
+
+
+def search_uniprot(solr_query, limit, fields=None, prefetch=False, base_url=SEARCH_URL, first_response=None):
+    """Collect up to limit entries into the UniProt search response shape."""
+    return {"results": list(iter_uniprot_results(solr_query, limit, fields, prefetch, base_url, first_response))}
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+
+from src.uniprotClient import fetch_first_page, search_uniprot
+
+CACHE_DB_PATH = os.getenv("UNIPROT_CACHE_PATH", "asset/uniprot_cache.db")
+CACHE_ENABLED = os.getenv("UNIPROT_CACHE", "1").lower() not in ("0", "false", "no")
+# results are served without asking upstream for this long
+FRESH_SECONDS = int(os.getenv("UNIPROT_CACHE_FRESH", str(24 * 3600)))
+# UniProt publishes a release roughly every 8 weeks; entries fetched under the
+# current release stay fresh that long, and are served stale during outages
+RELEASE_SECONDS = 8 * 7 * 24 * 3600
+# compressed bodies kept on disk; least recently fetched or revalidated
+# entries are dropped beyond this
+CACHE_MAX_BYTES = int(os.getenv("UNIPROT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_initialized = False
+# newest X-UniProt-Release seen on any response, or stored in the cache;
+# read and written under _lock
+_latest_release: str | None = None
+
+
+def _connect():
+    # callers hold _lock
+    global _initialized, _latest_release
+    conn = sqlite3.connect(CACHE_DB_PATH, timeout=10)
+    if not _initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS uniprot_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                query TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                release TEXT,
+                fetched REAL
+            )
+        """)
+        conn.commit()
+        # the release freshness check applies right after a restart, not only
+        # once a miss has seen the current release again
+        stored = conn.execute("SELECT MAX(release) FROM uniprot_response_cache").fetchone()[0]
+        if stored and (_latest_release is None or stored > _latest_release):
+            _latest_release = stored
+        _initialized = True
+    return conn
+
+
+def normalizeQuery(solr_query):
+    return re.sub(r"\s+", " ", (solr_query or "").strip())
+
+
+def cacheKey(solr_query, limit, fields=None):
+    if fields and not isinstance(fields, str):
+        fields = ",".join(fields)
+    payload = json.dumps({"query": normalizeQuery(solr_query), "size": int(limit), "fields": fields or ""})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _load(key):
+    with _lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT body, etag, last_modified, release, fetched FROM uniprot_response_cache WHERE cache_key = ?",
+            (key,),
+        ).fetchone()
+        conn.close()
+    if row is None:
+        return None
+    body, etag, last_modified, release, fetched = row
+    return {
+        "body": body,
+        "etag": etag,
+        "last_modified": last_modified,
+        "release": release,
+        "fetched": fetched,
+    }
+
+
+def _store(key, solr_query, result, response):
+    global _latest_release
+    release = response.headers.get("X-UniProt-Release")
+    body = zlib.compress(json.dumps(result).encode("utf-8"), 6)
+    with _lock:
+        conn = _connect()
+        if release and (_latest_release is None or release > _latest_release):
+            _latest_release = release
+        conn.execute(
+            "INSERT OR REPLACE INTO uniprot_response_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                normalizeQuery(solr_query),
+                body,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                release,
+                time.time(),
+            ),
+        )
+        # fetched is also bumped by _touch on revalidation, so the oldest
+        # value marks the least recently used entry
+        total = conn.execute("SELECT COALESCE(SUM(length(body)), 0) FROM uniprot_response_cache").fetchone()[0]
+        if total > CACHE_MAX_BYTES:
+            for cacheKeyToDrop, size in conn.execute(
+                "SELECT cache_key, length(body) FROM uniprot_response_cache ORDER BY fetched"
+            ).fetchall():
+                if total <= CACHE_MAX_BYTES:
+                    break
+                conn.execute("DELETE FROM uniprot_response_cache WHERE cache_key = ?", (cacheKeyToDrop,))
+                total -= size
+        conn.commit()
+        conn.close()
+
+
+def _touch(key):
+    with _lock:
+        conn = _connect()
+        conn.execute("UPDATE uniprot_response_cache SET fetched = ? WHERE cache_key = ?", (time.time(), key))
+        conn.commit()
+        conn.close()
+
+
+def _isFresh(entry):
+    age = time.time() - entry["fetched"]
+    if age < FRESH_SECONDS:
+        return True
+    with _lock:
+        latest = _latest_release
+    return (
+        entry["release"] is not None
+        and entry["release"] == latest
+        and age < RELEASE_SECONDS
+    )
+
+
+def _decode(entry):
+    return json.loads(zlib.decompress(entry["body"]).decode("utf-8"))
+
+
+def cached_search_uniprot(solr_query, limit, fields=None):
+    """
+    search_uniprot with a persistent, compressed on-disk cache. Fresh entries
+    are served directly; stale ones are revalidated with If-None-Match /
+    If-Modified-Since when the upstream sent validators, and served as-is
+    when rest.uniprot.org cannot be reached.
+    """
+    # later pages are fetched while the current one is decoded
+    if not CACHE_ENABLED:
+        return search_uniprot(solr_query, limit, fields, prefetch=True)
+
+    key = cacheKey(solr_query, limit, fields)
+    entry = _load(key)
+    if entry is not None and _isFresh(entry):
+        return _decode(entry)
+
+    headers = {}
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        first = fetch_first_page(solr_query, limit, fields, headers=headers or None)
+        if first.status_code == 304 and entry is not None:
+            _touch(key)
+            return _decode(entry)
+        result = search_uniprot(solr_query, limit, fields, prefetch=True, first_response=first)
+    except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+        # stale-if-error: keep answering during upstream outages
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        if entry is not None and (status is None or status >= 500 or status == 429):
+            return _decode(entry)
+        raise
+
+    _store(key, solr_query, result, first)
+    return result
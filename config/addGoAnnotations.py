@@ -1,25 +1,22 @@
+import csv
 import pandas as pd
 import sqlite3
 
-def removeIEAAnnotations() :
-    inputFile = 'asset/goa_uniprot_all.gpa'
-    outputFile = 'asset/goa_uniprot_updated.gpa'
+from bulkLoad import bulkLoad, createIndexes, insertMany
+from createInformationTables import rebuildBackgroundDistributionCount
 
-    # this information retrived from : 
-    # https://raw.githubusercontent.com/evidenceontology/evidenceontology/master/gaf-eco-mapping.txt
-    notDesiredEvidenceCodes = {
-        'ECO:0000501', 'ECO:0000256', 'ECO:0000501', 'ECO:0007322', 'ECO:0007322', 'ECO:0000501', 'ECO:0000265', 'ECO:0000501', 'ECO:0000501', 'ECO:0000501', 'ECO:0000501', 'ECO:0000249', 'ECO:000036'
-    }
+# this information retrived from : 
+# https://raw.githubusercontent.com/evidenceontology/evidenceontology/master/gaf-eco-mapping.txt
+notDesiredEvidenceCodes = {
+    'ECO:0000501', 'ECO:0000256', 'ECO:0000501', 'ECO:0007322', 'ECO:0007322', 'ECO:0000501', 'ECO:0000265', 'ECO:0000501', 'ECO:0000501', 'ECO:0000501', 'ECO:0000501', 'ECO:0000249', 'ECO:000036'
+}
 
-    with open(inputFile, 'r') as file, open(outputFile, 'w') as outFile:
-        for line in file:
-            if line.startswith('!'):
-                continue
-            parts = line.strip().split('\t')
-            if len(parts) > 6 and parts[5] not in notDesiredEvidenceCodes:
-                outFile.write(line)
-
-    print(f'Filtered data saved to {outputFile}')
+# GPA 1.1 columns we keep: DB_Object_ID, GO ID, evidence code (ECO);
+# GPA 2.0 moves them (and prefixes the object id), so other versions are rejected
+GPA_VERSION = "1.1"
+GPA_COLUMN_COUNT = 12
+PROTEIN_COLUMN, GO_COLUMN, EVIDENCE_COLUMN = 1, 3, 5
+CHUNK_ROWS = 500_000
 
 def createProteinGoMappingTable(dbPath = "asset/protein_index2.db"):
     conn = sqlite3.connect(dbPath)
@@ -33,44 +30,74 @@ def createProteinGoMappingTable(dbPath = "asset/protein_index2.db"):
         PRIMARY KEY (protein_id, go_id)
     );
     ''')
-    cursor.execute('''CREATE INDEX IF NOT EXISTS protein_id_index ON protein_go_mapping(protein_id)''')
-    cursor.execute('''CREATE INDEX IF NOT EXISTS go_id_index ON protein_go_mapping(go_id)''')
+    # secondary indexes are created by ingestGoaFile once the table is filled
     conn.commit()
     conn.close()
 
-def processGoaFile(dbPath = "asset/protein_index2.db", goaFilePath = "goa_uniprot_updated.gpa" ):
-    conn = sqlite3.connect(dbPath)
-    cursor = conn.cursor()
-
-    cursor.execute('SELECT protein_id FROM id_map')
-    validProteins = set(row[0] for row in cursor.fetchall())
-
+def _readHeader(goaFilePath):
+    # "!" header lines only appear at the top of a GPA file; returns their
+    # count and the "!gpa-version:" value
+    count, version = 0, None
     with open(goaFilePath, 'r') as file:
         for line in file:
-            if line.startswith("!"): 
-                continue
-            
-            columns = line.strip().split("\t")
-            proteinId = columns[1] 
-            goId = columns[3]      
-            evidenceCode = columns[5]
+            if not line.startswith("!"):
+                break
+            if line.startswith("!gpa-version:"):
+                version = line.split(":", 1)[1].strip()
+            count += 1
+    return count, version
+
+def ingestGoaFile(dbPath = "asset/protein_index2.db", goaFilePath = "asset/goa_uniprot_all.gpa", chunkRows = CHUNK_ROWS):
+    """
+    Single pass over the GPA file: read it in chunks of chunkRows lines, drop
+    electronic (notDesiredEvidenceCodes) annotations and proteins missing from
+    id_map with vectorized filters, bulk-insert the rest into protein_go_mapping
+    and rebuild background_distribution_count from it.
+    """
+    headerLines, version = _readHeader(goaFilePath)
+    if version != GPA_VERSION:
+        raise ValueError(f"{goaFilePath}: expected !gpa-version: {GPA_VERSION}, found {version or 'no version header'}")
+
+    reader = pd.read_csv(
+        goaFilePath,
+        sep="\t",
+        header=None,
+        names=range(GPA_COLUMN_COUNT),
+        skiprows=headerLines,
+        dtype=str,
+        keep_default_na=False,
+        quoting=csv.QUOTE_NONE,
+        on_bad_lines="warn",
+        chunksize=chunkRows,
+    )
 
-            if proteinId not in validProteins:
-                continue
+    with bulkLoad(dbPath) as conn:
+        # unique Index: its hash table is built once and reused for every chunk
+        validProteins = pd.Index(pd.read_sql_query("SELECT DISTINCT protein_id FROM id_map", conn)["protein_id"])
+        readCount = insertCount = 0
 
-            cursor.execute('''
+        for chunk in reader:
+            annotations = chunk[[PROTEIN_COLUMN, GO_COLUMN, EVIDENCE_COLUMN]]
+            keep = (
+                (annotations[EVIDENCE_COLUMN] != "")
+                & ~annotations[EVIDENCE_COLUMN].isin(notDesiredEvidenceCodes)
+                & (validProteins.get_indexer(annotations[PROTEIN_COLUMN]) >= 0)
+            )
+            # first annotation per (protein, GO term) wins, as with INSERT OR IGNORE
+            annotations = annotations[keep].drop_duplicates([PROTEIN_COLUMN, GO_COLUMN])
+            insertCount += insertMany(conn, '''
             INSERT OR IGNORE INTO protein_go_mapping (protein_id, go_id, evidence_code)
             VALUES (?, ?, ?)
-            ''', (proteinId, goId, evidenceCode))
-            
-    conn.commit()
-    conn.close()
+            ''', annotations.itertuples(index=False, name=None))
+            readCount += len(chunk)
+            print(f"  • Read {readCount} annotations, kept {insertCount}…")
 
-# to remove electronic GO annotations:
-removeIEAAnnotations()
+        createIndexes(conn, "protein_go_mapping")
+        rebuildBackgroundDistributionCount(conn)
+    print(f"protein_go_mapping and background_distribution_count rebuilt from {goaFilePath}.")
 
 # to create protein_go_mapping table:
 createProteinGoMappingTable()
 
-# to fill protein_go_mapping table:
-processGoaFile()
\ No newline at end of file
+# to fill protein_go_mapping (without electronic annotations) and its background counts:
+ingestGoaFile()
@@ -0,0 +1,50 @@
+import sqlite3
+
+# (index name, table, columns) for the lookups the backend runs per request.
+# Names are prefixed with the table: SQLite index names are global, and the
+# older protein_id_index on protein_go_mapping silently collided with the one
+# on id_map.
+INDEXES = [
+    # sequence retriever / local Solr executor: protein_id -> file_id
+    ("idx_flat_files_mapping_protein_file", "flat_files_mapping", ("protein_id", "file_id")),
+    # local Solr executor go:GO:xxxxxxx -> proteins, background counts
+    ("idx_protein_go_mapping_go_protein", "protein_go_mapping", ("go_id", "protein_id")),
+    # GO enrichment: proteins of interest -> go_id
+    ("idx_protein_go_mapping_protein_go", "protein_go_mapping", ("protein_id", "go_id")),
+    # metadata lookups by accession from id_map
+    ("idx_id_map_protein", "id_map", ("protein_id",)),
+    # local Solr executor gene / organism_name / organism_id / id lookups
+    ("idx_protein_info_gn", "protein_info", ("gn COLLATE NOCASE",)),
+    ("idx_protein_info_os", "protein_info", ("os COLLATE NOCASE",)),
+    ("idx_protein_info_ox", "protein_info", ("ox",)),
+    ("idx_protein_info_name", "protein_info", ("protein_name COLLATE NOCASE",)),
+    # local Solr executor length:[a TO b]
+    ("idx_sequence_checksums_length", "sequence_checksums", ("length", "protein_id")),
+]
+
+
+def addIndexes(dbPath="asset/protein_index2.db", analyze=True):
+    """
+    Create the covering indexes listed in INDEXES on an existing database.
+    Idempotent; tables that do not exist yet are skipped.
+    """
+    conn = sqlite3.connect(dbPath)
+    cursor = conn.cursor()
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    for name, table, columns in INDEXES:
+        if table not in tables:
+            print(f"Skipping {name}: table {table} does not exist")
+            continue
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})")
+        print(f"Index {name} on {table}({', '.join(columns)}) is ready.")
+
+    if analyze:
+        # planner statistics, so the new indexes are chosen on the real data
+        cursor.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+if __name__ == "__main__":
+    addIndexes()
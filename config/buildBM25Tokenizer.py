@@ -1,5 +1,7 @@
+import os
 import pickle
 import sqlite3
+import sys
 from langchain_community.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from pinecone_text.sparse import BM25Encoder
@@ -8,12 +10,17 @@ from pinecone_text.sparse.bm25_tokenizer import BM25Tokenizer
 PERSIST_DIR   = "chroma_uniprot_nomic"        
 BM25_PATH     = "bm25_model_fromflatfiles.pkl"              
 EMBED_MODEL   = "nomic-ai/nomic-embed-text-v1"
-DB_PATH       = "backend/asset/protein_index2.db"
+DB_PATH       = "backend/asset/protein_content.db"   # flat_files lives in the content database
+
+# flat_text() decodes flat_files rows whether or not compressFlatFiles.py has run
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from src.flatFileCodec import registerDecoder  # noqa: E402
 
 def build_and_save_bm25(outpath = BM25_PATH):    
     conn = sqlite3.connect(DB_PATH)
+    registerDecoder(conn)
     cursor = conn.cursor()
-    cursor.execute("SELECT content FROM flat_files")
+    cursor.execute("SELECT flat_text(content) FROM flat_files")
     rows = cursor.fetchall()
     conn.close()
     
@@ -0,0 +1,80 @@
+"""
+Bulk-load helpers for the SQLite build scripts.
+
+A build step opens its database with bulkLoad(), which runs the whole step in
+one transaction with a large page cache and a single fsync at COMMIT; rows go
+in through insertMany() in large executemany batches, and secondary indexes
+are created by createIndexes() once the table is filled.
+
+    with bulkLoad("asset/protein_index2.db") as conn:
+        conn.execute("CREATE TABLE ...")
+        insertMany(conn, "INSERT INTO ... VALUES (?, ?)", rows)
+        createIndexes(conn, "id_map")
+
+protein_index2.db is shared by several build steps, so the rollback journal
+stays on: a step that fails is rolled back and leaves the tables written by
+the other steps intact. Only a database that is rebuilt as a whole from its
+sources (the flat_files content database) may drop the journal with
+applyBulkPragmas(conn, journal=False); if such a build fails, delete the file
+and run it again.
+"""
+import sqlite3
+from contextlib import contextmanager
+from itertools import islice
+
+from addIndexes import INDEXES
+
+BATCH_SIZE = 50_000
+# page cache for the build connection, in KiB (negative cache_size)
+BUILD_CACHE_KIB = 512 * 1024
+
+
+def applyBulkPragmas(conn, journal=True):
+    if journal:
+        # fsync only when a transaction commits, which bulk loads do rarely
+        conn.execute("PRAGMA synchronous=NORMAL")
+    else:
+        # no rollback journal and no fsync: a failure mid-build leaves a
+        # database that has to be rebuilt from scratch
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA cache_size=-{BUILD_CACHE_KIB}")
+
+
+@contextmanager
+def bulkLoad(dbPath):
+    """Connection for one build step, committed as a single transaction on exit."""
+    conn = sqlite3.connect(dbPath, isolation_level=None)
+    applyBulkPragmas(conn)
+    conn.execute("BEGIN")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        # SQLite may already have rolled back on its own (e.g. disk full)
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def insertMany(conn, sql, rows, batchSize=BATCH_SIZE):
+    """executemany over any iterable of rows, batchSize rows at a time. Returns the row count."""
+    rows = iter(rows)
+    count = 0
+    while True:
+        batch = list(islice(rows, batchSize))
+        if not batch:
+            return count
+        conn.executemany(sql, batch)
+        count += len(batch)
+
+
+def createIndexes(conn, table):
+    """Create the lookup indexes of config/addIndexes.py for a freshly loaded table."""
+    for name, indexedTable, columns in INDEXES:
+        if indexedTable == table:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})")
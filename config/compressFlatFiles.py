@@ -0,0 +1,65 @@
+import sqlite3
+
+import zstandard
+
+DICTIONARY_TABLE = "flat_files_dictionary"
+
+
+def compressFlatFiles(dbPath="asset/protein_content.db", sampleSize=20000, dictSize=112 * 1024, level=19, batchSize=2000):
+    """
+    Train a zstd dictionary on a random sample of flat_files records and
+    replace every plain-text content row with a compressed BLOB framed with
+    that dictionary's id. The dictionary is stored in flat_files_dictionary;
+    the backend decodes rows with flat_text() (backend/src/flatFileCodec.py).
+
+    The build scripts that read flat_files afterwards (createFlatFileMappingTable,
+    createVirtualFlatFileTable, buildBM25Tokenizer) go through flat_text() too.
+    """
+    conn = sqlite3.connect(dbPath)
+    cursor = conn.cursor()
+
+    samples = [
+        row[0].encode("utf-8")
+        for row in cursor.execute(
+            "SELECT content FROM flat_files WHERE typeof(content) = 'text' ORDER BY random() LIMIT ?", (sampleSize,)
+        )
+    ]
+    if not samples:
+        print("No plain-text rows left in flat_files; nothing to compress.")
+        conn.close()
+        return
+
+    print(f"Training a {dictSize // 1024} KiB zstd dictionary on {len(samples)} records…")
+    dictionary = zstandard.train_dictionary(dictSize, samples, level=level)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {DICTIONARY_TABLE} (dict_id INTEGER PRIMARY KEY, dictionary BLOB NOT NULL)")
+    cursor.execute(f"INSERT OR REPLACE INTO {DICTIONARY_TABLE} VALUES (?, ?)", (dictionary.dict_id(), dictionary.as_bytes()))
+    conn.commit()
+
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary, write_dict_id=True, write_content_size=True)
+    fileIds = [row[0] for row in cursor.execute("SELECT file_id FROM flat_files WHERE typeof(content) = 'text'")]
+    plainBytes = packedBytes = 0
+
+    for start in range(0, len(fileIds), batchSize):
+        batch = fileIds[start:start + batchSize]
+        rows = cursor.execute(
+            f"SELECT file_id, content FROM flat_files WHERE file_id IN ({','.join('?' * len(batch))})", batch
+        ).fetchall()
+        updates = []
+        for fileId, content in rows:
+            raw = content.encode("utf-8")
+            packed = compressor.compress(raw)
+            plainBytes += len(raw)
+            packedBytes += len(packed)
+            updates.append((packed, fileId))
+        cursor.executemany("UPDATE flat_files SET content = ? WHERE file_id = ?", updates)
+        conn.commit()
+        print(f"  • Compressed {min(start + batchSize, len(fileIds))}/{len(fileIds)} records")
+
+    print(f"Content: {plainBytes / 1e6:.1f} MB -> {packedBytes / 1e6:.1f} MB "
+          f"({plainBytes / max(packedBytes, 1):.2f}x). Reclaiming space (VACUUM)…")
+    cursor.execute("VACUUM")
+    conn.close()
+
+
+if __name__ == "__main__":
+    compressFlatFiles()
@@ -1,5 +1,13 @@
+import os
 import re
 import sqlite3
+import sys
+
+from bulkLoad import applyBulkPragmas, bulkLoad, createIndexes, insertMany
+
+# flat_text() decodes flat_files rows whether or not compressFlatFiles.py has run
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from src.flatFileCodec import registerDecoder  # noqa: E402
 
 def createProteinInformationTable(dbFile = "asset/protein_index2.db", fastaFile = "asset/uniprot_sprot.fasta"):
     # regular expression pattern explanation:
@@ -24,76 +32,51 @@ def createProteinInformationTable(dbFile = "asset/protein_index2.db", fastaFile
         r"$"
     )
 
-    conn = sqlite3.connect(dbFile)
-    cur = conn.cursor()
-
-    cur.execute("DROP TABLE IF EXISTS protein_info")
-    cur.execute("""
-        CREATE TABLE protein_info (
-            protein_id TEXT PRIMARY KEY,
-            protein_name TEXT,
-            type TEXT,
-            os TEXT,
-            ox TEXT,
-            gn TEXT,
-            pe TEXT,
-            sv TEXT
-        )
-    """)
-    conn.commit()
-
-    with open(fastaFile, "r") as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith(">sp|"):
-                match = pattern.match(line)
-                if match:
-                    record = match.groupdict()
-                    cur.execute("""
-                        INSERT INTO protein_info (protein_id, protein_name, type, os, ox, gn, pe, sv)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        record.get("protein_id"),
-                        record.get("protein_name"),
-                        record.get("type"),
-                        record.get("os"),
-                        record.get("ox"),
-                        record.get("gn"),
-                        record.get("pe"),
-                        record.get("sv")
-                    ))
-                else:
-                    print("Header line did not match expected format:", line)
-
-    conn.commit()
-    conn.close()
+    def readHeaders():
+        with open(fastaFile, "r") as file:
+            for line in file:
+                line = line.strip()
+                if line.startswith(">sp|"):
+                    match = pattern.match(line)
+                    if match:
+                        record = match.groupdict()
+                        yield (
+                            record.get("protein_id"),
+                            record.get("protein_name"),
+                            record.get("type"),
+                            record.get("os"),
+                            record.get("ox"),
+                            record.get("gn"),
+                            record.get("pe"),
+                            record.get("sv")
+                        )
+                    else:
+                        print("Header line did not match expected format:", line)
+
+    with bulkLoad(dbFile) as conn:
+        conn.execute("DROP TABLE IF EXISTS protein_info")
+        conn.execute("""
+            CREATE TABLE protein_info (
+                protein_id TEXT PRIMARY KEY,
+                protein_name TEXT,
+                type TEXT,
+                os TEXT,
+                ox TEXT,
+                gn TEXT,
+                pe TEXT,
+                sv TEXT
+            )
+        """)
+        count = insertMany(conn, """
+            INSERT INTO protein_info (protein_id, protein_name, type, os, ox, gn, pe, sv)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, readHeaders())
+        createIndexes(conn, "protein_info")
+    print(f"Inserted {count} rows into protein_info.")
 
 #createProteinInformationTable()
 
-def process_obo_file():
-    db_path = "asset/protein_index2.db"
-    obo_file_path = "asset/go-basic.obo"
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS go_info (
-        go_id TEXT PRIMARY KEY,
-        go_name TEXT,
-        namespace TEXT,
-        alt_id TEXT,
-        def TEXT,
-        comment TEXT,
-        synonym TEXT,
-        is_obsolete TEXT,
-        replaced_by TEXT,
-        consider TEXT,
-        is_a TEXT
-    );
-    ''')
-    conn.commit()
-
+def process_obo_file(db_path="asset/protein_index2.db", obo_file_path="asset/go-basic.obo"):
     with open(obo_file_path, 'r') as file:
         content = file.read()
 
@@ -113,62 +96,70 @@ def process_obo_file():
         'is_a': r'^is_a: (GO:\d+)'
     }
 
-    for term in terms_section:
-        data = {field: [] for field in field_patterns}
-        
-        for field, pattern in field_patterns.items():
-            matches = re.findall(pattern, term, re.MULTILINE)
-            if matches:
-                data[field] = matches
-        
-        for field, values in data.items():
-            if values:
-                data[field] = ', '.join(values)
-
-        go_id = data['go_id']
-        if go_id:  # skip duplicate go_id
-            cursor.execute('''
-            INSERT OR REPLACE INTO go_info (go_id, go_name, namespace, alt_id, def, comment, synonym, is_obsolete, replaced_by, consider, is_a)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data['go_id'],
-                data['go_name'] if data['go_name'] else None,
-                data['namespace'] if data['namespace'] else None,
-                data['alt_id'] if data['alt_id'] else None,
-                data['def'] if data['def'] else None,
-                data['comment'] if data['comment'] else None,
-                data['synonym'] if data['synonym'] else None,
-                data['is_obsolete'] if data['is_obsolete'] else None,
-                data['replaced_by'] if data['replaced_by'] else None,
-                data['consider'] if data['consider'] else None,
-                data['is_a'] if data['is_a'] else None
-            ))
-        conn.commit()
-    conn.close()
+    def readTerms():
+        for term in terms_section:
+            data = {}
+            for field, pattern in field_patterns.items():
+                matches = re.findall(pattern, term, re.MULTILINE)
+                data[field] = ', '.join(matches) if matches else None
+
+            if data['go_id']:
+                yield tuple(data.values())
+
+    with bulkLoad(db_path) as conn:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS go_info (
+            go_id TEXT PRIMARY KEY,
+            go_name TEXT,
+            namespace TEXT,
+            alt_id TEXT,
+            def TEXT,
+            comment TEXT,
+            synonym TEXT,
+            is_obsolete TEXT,
+            replaced_by TEXT,
+            consider TEXT,
+            is_a TEXT
+        );
+        ''')
+        # skip duplicate go_id
+        count = insertMany(conn, '''
+        INSERT OR REPLACE INTO go_info (go_id, go_name, namespace, alt_id, def, comment, synonym, is_obsolete, replaced_by, consider, is_a)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', readTerms())
+    print(f"Inserted {count} terms into go_info.")
     
 
 #process_obo_file()
 #print("Database table 'go_info' created and populated successfully.")
 
-def createBackgroundDistributionCountMaterializedView(dbPath):
-    conn = sqlite3.connect(dbPath)
-    cursor = conn.cursor()
-    cursor.execute("DROP TABLE IF EXISTS background_distribution_count;")
-    cursor.execute("CREATE TABLE background_distribution_count (go_id TEXT PRIMARY KEY, background_distribution INTEGER);")
-    cursor.execute("""
+def rebuildBackgroundDistributionCount(conn):
+    conn.execute("DROP TABLE IF EXISTS background_distribution_count;")
+    conn.execute("CREATE TABLE background_distribution_count (go_id TEXT PRIMARY KEY, background_distribution INTEGER);")
+    conn.execute("""
         INSERT INTO background_distribution_count (go_id, background_distribution)
         SELECT go_id, COUNT(DISTINCT protein_id)
         FROM protein_go_mapping
         GROUP BY go_id;
     """)
-    
+
+
+def createBackgroundDistributionCountMaterializedView(dbPath):
+    conn = sqlite3.connect(dbPath)
+    rebuildBackgroundDistributionCount(conn)
     conn.commit()
     conn.close()
 
 
-def createFlatFileMappingTable(dbPath):
+def createFlatFileMappingTable(dbPath, contentDbPath="asset/protein_content.db"):
+    # config/uniprotDatReader.py writes the mapping while loading flat_files;
+    # this re-scan is only needed for content databases built before that
     conn = sqlite3.connect(dbPath)
+    applyBulkPragmas(conn)
     cursor = conn.cursor()
+    # the mapping is metadata; flat_files itself is read from the content database
+    cursor.execute("ATTACH DATABASE ? AS content", (contentDbPath,))
+    registerDecoder(conn)
 
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS flat_files_mapping (
@@ -178,28 +169,26 @@ def createFlatFileMappingTable(dbPath):
         )
     ''')
 
-    cursor.execute('SELECT file_id, content FROM flat_files')
-    records = cursor.fetchall()
-
-    for fileId, content in records:
-        match = re.search(r'^AC\s+(\w+);', content, re.MULTILINE)
-        if match:
-            protein_id = match.group(1)
-            try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO flat_files_mapping (protein_id, file_id)
-                    VALUES (?, ?)
-                ''', (protein_id, fileId))
-            except sqlite3.IntegrityError as e:
-                print(f"Error inserting for file_id {fileId}: {e}")
-        else:
-            print(f"No protein ID found for file_id {fileId}")
+    def readMappings():
+        for fileId, content in cursor.execute('SELECT file_id, flat_text(content) FROM content.flat_files'):
+            match = re.search(r'^AC\s+(\w+);', content, re.MULTILINE)
+            if match:
+                yield match.group(1), fileId
+            else:
+                print(f"No protein ID found for file_id {fileId}")
+
+    insertMany(conn, '''
+        INSERT OR IGNORE INTO flat_files_mapping (protein_id, file_id)
+        VALUES (?, ?)
+    ''', readMappings())
+    createIndexes(conn, "flat_files_mapping")
 
     conn.commit()
     conn.close()
 
-def createVirtualFlatFileTable(dbPath="asset/protein_index2.db"):
+def createVirtualFlatFileTable(dbPath="asset/protein_content.db"):
     conn = sqlite3.connect(dbPath)
+    registerDecoder(conn)
     cursor = conn.cursor()
 
     try:
@@ -215,8 +204,8 @@ def createVirtualFlatFileTable(dbPath="asset/protein_index2.db"):
         print("flat_files_fts table is created.")
 
         cursor.execute("""
-            INSERT INTO flat_files_fts(content)
-            SELECT content FROM flat_files;
+            INSERT INTO flat_files_fts(rowid, content)
+            SELECT CAST(file_id AS INTEGER), flat_text(content) FROM flat_files;
         """)
 
         conn.commit()
@@ -3,6 +3,8 @@ import numpy as np
 from annoy import AnnoyIndex
 import sqlite3
 
+from bulkLoad import bulkLoad, createIndexes, insertMany
+
 filePath = 'asset/per-protein.h5'
 indexFile = 'protein_embeddings.ann'
 databaseFile = 'protein_index2.db'
@@ -23,17 +25,11 @@ def buildAnnoyDb(embeddings, num_trees=10):
     return index
 
 def storeIdMap(ids):
-    conn = sqlite3.connect(databaseFile)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS id_map (index_id INTEGER PRIMARY KEY, protein_id TEXT)''')
-    
-    c.execute('''CREATE INDEX IF NOT EXISTS protein_id_index ON id_map(protein_id)''')
-    
-    for i, protein_id in enumerate(ids):
-        c.execute('INSERT INTO id_map (index_id, protein_id) VALUES (?, ?)', (i, protein_id))
-    
-    conn.commit()
-    conn.close()
+    with bulkLoad(databaseFile) as conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS id_map (index_id INTEGER PRIMARY KEY, protein_id TEXT)''')
+        insertMany(conn, 'INSERT INTO id_map (index_id, protein_id) VALUES (?, ?)', enumerate(ids))
+        # index after loading: building it once is much cheaper than maintaining it per insert
+        createIndexes(conn, "id_map")
     print(f"ID map stored in SQLite database at {databaseFile}")
 
 def findEmbedding(filePath, key, output_file):
@@ -1,12 +1,11 @@
-import os
-import re
-import sqlite3
 import torch
 from transformers import AutoTokenizer
 from langchain_community.vectorstores import Chroma
 from langchain_community.docstore.document import Document
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from uniprotDatReader import RecordWriter, streamRecords
+
 # ───────────────────────────────────────────────
 # Configuration
 # ───────────────────────────────────────────────
@@ -15,8 +14,12 @@ device           = "cuda:3" if torch.cuda.is_available() else "cpu"
 chunkTokens      = 4096
 overlapTokens    = 512
 modelMaxTokens   = 8192
-sqlitePath       = "backend/asset/protein_index2.db"
-tableName        = "flat_files"
+# flat-file content lives in its own database, next to protein_index2.db
+# (metadata); the backend ATTACHes it at runtime
+sqlitePath       = "backend/asset/protein_content.db"
+metadataPath     = "backend/asset/protein_index2.db"
+# chunks embedded and added to Chroma at a time
+embedBatchSize   = 2048
 
 # ───────────────────────────────────────────────
 # Shared tokenizer
@@ -26,110 +29,50 @@ tokenizer = AutoTokenizer.from_pretrained(
     modelName, trust_remote_code=True, use_fast=True
 )
 
-# ───────────────────────────────────────────────
-# SQLite helpers
-# ───────────────────────────────────────────────
-def initSqlite(path: str = sqlitePath):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    conn = sqlite3.connect(path)
-    with conn:
-        conn.execute(
-            f"""CREATE TABLE IF NOT EXISTS {tableName} (
-                   file_id TEXT PRIMARY KEY, 
-                   content    TEXT    NOT NULL
-               )"""
-        )
-    return conn
-
-
-def storeRecordsSqlite(conn: sqlite3.Connection, recordList):
-    cursor = conn.cursor()
-    for recordIndex, recordContent in enumerate(recordList):
-        cursor.execute(
-            f"INSERT OR IGNORE INTO {tableName} (file_id, content) VALUES (?, ?);",
-            (recordIndex, recordContent)
-        )
-    conn.commit()
-
-# ───────────────────────────────────────────────
-# File loading & cleaning
-# ───────────────────────────────────────────────
-def loadRecords(filePath, delimiter=r"^//[ \t]*\r?\n(?=ID)"):
-    print(f"Loading records from {filePath}")
-    with open(filePath, encoding="utf-8") as fh:
-        fullText = fh.read()
-
-    rawRecords = [
-        chunk.strip()
-        for chunk in re.split(delimiter, fullText, flags=re.MULTILINE)
-        if chunk.strip()
-    ]
-    print(f"Loaded {len(rawRecords)} raw records.")
-
-    cleanedRecords = []
-    for recordIndex, rawRecord in enumerate(rawRecords):
-        filteredLines, inSequence = [], False
-        for line in rawRecord.splitlines():
-            if line.startswith("SQ") or line.startswith(" "):
-                inSequence = True
-            else:
-                inSequence = False
-            if inSequence:
-                continue
-            filteredLines.append(line)
-        cleanedText = "\n".join(filteredLines).strip()
-        cleanedRecords.append(cleanedText)
-
-        if (recordIndex + 1) % 10_000 == 0:
-            print(f"  • Processed {recordIndex + 1} records…")
-
-    print(f"Cleaned {len(cleanedRecords)} records (sequence sections removed).")
-    return cleanedRecords
-
 # ───────────────────────────────────────────────
 # Chunking
 # ───────────────────────────────────────────────
-def chunkRecords(recordsList):
+def chunkRecord(recordIndex, recordText):
     """
-    Slice each record into chunkTokens windows (with overlapTokens overlap).
-    Each chunk stores only (file_id, chunk_id) as metadata.
+    Slice a record into chunkTokens windows (with overlapTokens overlap).
+    Each chunk stores (file_id, chunk_id) and its character span in the
+    record (char_start, char_end) as metadata: the decoded chunk text is
+    lower-cased and re-spaced, so it cannot be found in the record again.
     """
-    print("Token-based splitting of records…")
     chunkList = []
+    encoding = tokenizer(recordText, add_special_tokens=False, return_offsets_mapping=True)
+    tokenIds, offsets = encoding["input_ids"], encoding["offset_mapping"]
+    start, chunkId = 0, 0
+    while start < len(tokenIds):
+        segmentIds = tokenIds[start : start + chunkTokens]
+        chunkText = tokenizer.decode(
+            segmentIds,
+            skip_special_tokens=True,
+            clean_up_tokenization_spaces=True,
+        )
 
-    for recordIndex, recordText in enumerate(recordsList):
-        tokenIds = tokenizer.encode(recordText, add_special_tokens=False)
-        start, chunkId = 0, 0
-        while start < len(tokenIds):
-            segmentIds = tokenIds[start : start + chunkTokens]
+        # safety net (shouldn’t trigger)
+        if len(tokenizer.encode(chunkText, add_special_tokens=False)) > modelMaxTokens:
+            truncated = tokenizer.encode(chunkText, add_special_tokens=False)[:modelMaxTokens]
             chunkText = tokenizer.decode(
-                segmentIds,
+                truncated,
                 skip_special_tokens=True,
                 clean_up_tokenization_spaces=True,
             )
 
-            # safety net (shouldn’t trigger)
-            if len(tokenizer.encode(chunkText, add_special_tokens=False)) > modelMaxTokens:
-                truncated = tokenizer.encode(chunkText, add_special_tokens=False)[:modelMaxTokens]
-                chunkText = tokenizer.decode(
-                    truncated,
-                    skip_special_tokens=True,
-                    clean_up_tokenization_spaces=True,
-                )
-
-            chunkList.append(
-                Document(
-                    page_content=chunkText,
-                    metadata={"file_id": recordIndex, "chunk_id": chunkId},
-                )
+        chunkList.append(
+            Document(
+                page_content=chunkText,
+                metadata={
+                    "file_id": recordIndex,
+                    "chunk_id": chunkId,
+                    "char_start": offsets[start][0],
+                    "char_end": offsets[start + len(segmentIds) - 1][1],
+                },
             )
-            start += chunkTokens - overlapTokens
-            chunkId += 1
-
-        if (recordIndex + 1) % 5_000 == 0:
-            print(f"  • Chunked {recordIndex + 1} records…")
-
-    print(f"Generated {len(chunkList)} chunks from {len(recordsList)} records.")
+        )
+        start += chunkTokens - overlapTokens
+        chunkId += 1
     return chunkList
 
 # ───────────────────────────────────────────────
@@ -141,34 +84,40 @@ def createVectorDb(
 ):
     print("Building UniProt → Chroma index with Nomic embeddings…")
 
-    # 1. Parse & clean
-    recordsList = loadRecords(filePath)
-
-    # 2. Store full records once in SQLite (file_id is PK)
-    conn = initSqlite(sqlitePath)
-    storeRecordsSqlite(conn, recordsList)
-    print(f"Inserted {len(recordsList)} rows into {sqlitePath}.")
-
-    # 3. Chunk for embedding
-    chunkList = chunkRecords(recordsList)
-
-    # 4. Embedding model
+    # 1. Embedding model
     print(f"Loading embedding model on {device}…")
     embedFunction = HuggingFaceEmbeddings(
         model_name=modelName,
         model_kwargs={"device": device, "trust_remote_code": True},
         encode_kwargs={"normalize_embeddings": True},
     )
-
-    # 5. Embed & persist
-    print(f"Embedding & indexing {len(chunkList)} chunks …")
-    vectorDb = Chroma.from_documents(
-        documents=chunkList,
-        embedding=embedFunction,
+    vectorDb = Chroma(
         persist_directory=persistDirectory,
+        embedding_function=embedFunction,
     )
+
+    # 2. Stream parsed records (cleaned in worker processes): store each one
+    #    once in SQLite (content, accession mapping, sequence checksums) and
+    #    embed its chunks in batches, so memory does not grow with the input
+    chunkList, chunkCount = [], 0
+    with RecordWriter(sqlitePath, metadataPath) as writer:
+        for recordIndex, record in enumerate(streamRecords(filePath)):
+            writer.add(recordIndex, record)
+            chunkList.extend(chunkRecord(recordIndex, record.content))
+            if len(chunkList) >= embedBatchSize:
+                vectorDb.add_documents(chunkList)
+                chunkCount += len(chunkList)
+                chunkList = []
+                print(f"  • Embedded {chunkCount} chunks from {recordIndex + 1} records…")
+        if chunkList:
+            vectorDb.add_documents(chunkList)
+            chunkCount += len(chunkList)
+    print(f"Inserted {writer.count} rows into {sqlitePath}; embedded {chunkCount} chunks.")
+
     vectorDb.persist()
     print("Done! Chroma vector database written to:", persistDirectory)
 
 
-createVectorDb()
+# guarded: the record parser's worker processes may re-import this module
+if __name__ == "__main__":
+    createVectorDb()
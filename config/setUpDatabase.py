@@ -1,8 +1,10 @@
 import sqlite3
 import json
 
-def initialize_database():
-    conn = sqlite3.connect('protein_index2.db')
+from bulkLoad import bulkLoad, insertMany
+
+def initialize_database(dbPath="asset/protein_index2.db"):
+    conn = sqlite3.connect(dbPath)
     c = conn.cursor()
     c.execute('''
     CREATE TABLE IF NOT EXISTS search_fields (
@@ -30,52 +32,73 @@ def initialize_database():
     conn.commit()
     conn.close()
 
-def load_json_data(file_path, table):
-    conn = sqlite3.connect('protein_index2.db')
-    c = conn.cursor()
+def _bindable(row):
+    return all(value is None or isinstance(value, (str, int, float, bytes)) for value in row)
 
+def _validRows(rows):
+    # a value SQLite cannot bind would fail the whole executemany batch;
+    # skip such entries one by one instead
+    for row in rows:
+        if _bindable(row):
+            yield row
+        else:
+            print(f"An error occurred: unsupported value in entry {row[0]!r}, skipped")
+
+def load_json_data(file_path, table, dbPath="asset/protein_index2.db"):
     with open(file_path, 'r') as file:
         data = json.load(file)
-        for entry in data:
-            try:
-                if table == 'search_fields':
-                    c.execute('''
-                    INSERT OR IGNORE INTO search_fields (id, label, itemType, term, dataType, fieldType, example, regex)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        entry['id'], 
-                        entry['label'], 
-                        entry['itemType'], 
-                        entry.get('term', None), 
-                        entry.get('dataType', None), 
-                        entry.get('fieldType', None), 
-                        entry.get('example', None), 
-                        entry.get('regex', None)
-                    ))
-                elif table == 'result_fields':
-                    group_name = entry['groupName']
-                    is_database_group = entry['isDatabaseGroup']
-                    for field in entry['fields']:
-                        c.execute('''
-                        INSERT OR IGNORE INTO result_fields (id, groupName, isDatabaseGroup, label, name, sortField)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        ''', (
-                            field['id'], 
-                            group_name, 
-                            is_database_group, 
-                            field['label'], 
-                            field['name'], 
-                            field.get('sortField', None)
-                        ))
-            except sqlite3.Error as e:
-                print(f"An error occurred: {e}")
-    conn.commit()
-    conn.close()
 
-initialize_database()
+    if table == 'search_fields':
+        sql = '''
+        INSERT OR IGNORE INTO search_fields (id, label, itemType, term, dataType, fieldType, example, regex)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+        rows = (
+            (
+                entry['id'], 
+                entry['label'], 
+                entry['itemType'], 
+                entry.get('term', None), 
+                entry.get('dataType', None), 
+                entry.get('fieldType', None), 
+                entry.get('example', None), 
+                entry.get('regex', None)
+            )
+            for entry in data
+        )
+    elif table == 'result_fields':
+        sql = '''
+        INSERT OR IGNORE INTO result_fields (id, groupName, isDatabaseGroup, label, name, sortField)
+        VALUES (?, ?, ?, ?, ?, ?)
+        '''
+        rows = (
+            (
+                field['id'], 
+                entry['groupName'], 
+                entry['isDatabaseGroup'], 
+                field['label'], 
+                field['name'], 
+                field.get('sortField', None)
+            )
+            for entry in data
+            for field in entry['fields']
+        )
+    else:
+        return
+
+    try:
+        with bulkLoad(dbPath) as conn:
+            insertMany(conn, sql, _validRows(rows))
+    except sqlite3.Error as e:
+        # the load is rolled back; dbPath keeps its previous rows
+        print(f"An error occurred: {e}")
+        raise
+
+if __name__ == "__main__":
+    initialize_database()
 
-load_json_data('./asset/search-fields.json', 'search_fields')
-load_json_data('./asset/result-fields.json', 'result_fields')
+    load_json_data('./asset/search-fields.json', 'search_fields')
+    load_json_data('./asset/result-fields.json', 'result_fields')
 
 '''
 def print_first_five_records(table):
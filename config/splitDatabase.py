@@ -0,0 +1,107 @@
+import os
+import re
+import sqlite3
+
+# large, rarely-read tables that go to the content database; everything else
+# (protein_info, id_map, GO tables, field definitions, mappings) stays in the
+# compact metadata database
+CONTENT_TABLES = ("flat_files", "flat_files_fts")
+# rows whose MATCH -> rowid result is compared after the copy
+FTS_CHECK_SAMPLE = 100
+
+
+def _isShadowTable(name):
+    # fts5 keeps its index in <table>_data, _idx, _content, _docsize, _config;
+    # they are created together with the virtual table
+    return any(name == f"flat_files_fts_{suffix}" for suffix in ("data", "idx", "content", "docsize", "config"))
+
+
+def _inContentSchema(createSql, kind):
+    # CREATE [VIRTUAL] TABLE [IF NOT EXISTS] name ... -> ... content.name ...
+    return re.sub(rf"{kind}\s+(IF NOT EXISTS\s+)?", rf"{kind} \1content.", createSql, count=1)
+
+
+def _checkFtsRowids(cursor, dbPath):
+    # the copy must keep every rowid, and MATCH must still find the same rows
+    missing = cursor.execute(
+        "SELECT COUNT(*) FROM (SELECT rowid FROM main.flat_files_fts EXCEPT SELECT rowid FROM content.flat_files_fts)"
+    ).fetchone()[0]
+    if missing:
+        raise RuntimeError(f"flat_files_fts: {missing} rowids were not copied; leaving {dbPath} unchanged")
+    for rowid, content in cursor.execute(
+        "SELECT rowid, substr(content, 1, 200) FROM main.flat_files_fts ORDER BY random() LIMIT ?", (FTS_CHECK_SAMPLE,)
+    ).fetchall():
+        probe = next((word for word in re.findall(r"[A-Za-z0-9]{3,}", content)), None)
+        if probe is None:
+            continue
+        found = cursor.execute(
+            "SELECT 1 FROM content.flat_files_fts WHERE flat_files_fts MATCH ? AND rowid = ?", (f'"{probe}"', rowid)
+        ).fetchone()
+        if found is None:
+            raise RuntimeError(f"flat_files_fts: {probe!r} no longer matches rowid {rowid}; leaving {dbPath} unchanged")
+
+
+def splitDatabase(dbPath="asset/protein_index2.db", contentDbPath="asset/protein_content.db", dropFromSource=True):
+    """
+    Move flat_files and flat_files_fts out of a single-file protein database
+    into contentDbPath, then drop them from dbPath and VACUUM it, so that the
+    metadata file stays small enough to be kept fully cached. The backend
+    ATTACHes the content database at runtime (see backend/src/sqlitePool.py).
+    """
+    if os.path.exists(contentDbPath):
+        raise FileExistsError(f"{contentDbPath} already exists; remove it first")
+
+    conn = sqlite3.connect(dbPath)
+    cursor = conn.cursor()
+    cursor.execute("ATTACH DATABASE ? AS content", (contentDbPath,))
+
+    objects = cursor.execute(
+        "SELECT type, name, tbl_name, sql FROM main.sqlite_master WHERE sql IS NOT NULL"
+    ).fetchall()
+    tables = {name: sql for kind, name, _, sql in objects if kind == "table"}
+    indexes = [sql for kind, name, table, sql in objects if kind == "index" and table in CONTENT_TABLES]
+
+    for table in CONTENT_TABLES:
+        if table not in tables:
+            print(f"Skipping {table}: not in {dbPath}")
+            continue
+        # recreate the table (or virtual table) in the content schema, then copy
+        cursor.execute(_inContentSchema(tables[table], "TABLE"))
+        if table == "flat_files_fts":
+            # re-indexes the content into the new fts5 table; the rowid is the
+            # flat_files_mapping.file_id the local free-text lookup joins on
+            cursor.execute(
+                "INSERT INTO content.flat_files_fts(rowid, content) SELECT rowid, content FROM main.flat_files_fts"
+            )
+        else:
+            cursor.execute(f"INSERT INTO content.{table} SELECT * FROM main.{table}")
+        conn.commit()
+
+        copied = cursor.execute(f"SELECT COUNT(*) FROM content.{table}").fetchone()[0]
+        original = cursor.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+        if copied != original:
+            raise RuntimeError(f"{table}: copied {copied} of {original} rows; leaving {dbPath} unchanged")
+        if table == "flat_files_fts":
+            _checkFtsRowids(cursor, dbPath)
+        print(f"Copied {copied} rows of {table} to {contentDbPath}.")
+
+    for indexSql in indexes:
+        cursor.execute(_inContentSchema(indexSql, "INDEX"))
+    conn.commit()
+
+    if dropFromSource:
+        for table in CONTENT_TABLES:
+            if table in tables:
+                cursor.execute(f"DROP TABLE main.{table}")
+        conn.commit()
+        cursor.execute("DETACH DATABASE content")
+        print(f"Reclaiming space in {dbPath} (VACUUM)…")
+        cursor.execute("VACUUM")
+    conn.close()
+
+    remaining = [name for name in tables if name not in CONTENT_TABLES and not _isShadowTable(name)]
+    print(f"{dbPath} now holds: {', '.join(sorted(remaining))}")
+
+
+if __name__ == "__main__":
+    splitDatabase()
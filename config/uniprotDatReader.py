@@ -0,0 +1,265 @@
+"""
+Streaming reader for UniProtKB flat files (uniprot_sprot.dat).
+
+Records are read one at a time and parsed/cleaned in worker processes, with
+at most a few batches in flight, so memory stays bounded regardless of the
+input size. Shared by the build scripts:
+
+    for fileId, record in enumerate(streamRecords("backend/asset/uniprot_sprot.dat")):
+        record.accession, record.sections["DE"], record.sequence, record.content
+
+Run directly to write flat_files, flat_files_mapping, sequence_checksums and
+protein_terms in a single pass, without building the Chroma index:
+
+    python config/uniprotDatReader.py [uniprot_sprot.dat]
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from bulkLoad import applyBulkPragmas, createIndexes, insertMany
+
+BATCH_SIZE = 500
+CRC64_PATTERN = re.compile(r"(\w+) CRC64;")
+EC_PATTERN = re.compile(r"EC=([\d.n-]+)")
+EVIDENCE_PATTERN = re.compile(r"\s*\{[^}]*\}")
+
+
+class DatRecord(NamedTuple):
+    accession: str | None        # primary accession (first AC entry)
+    entry_name: str | None       # ID line, e.g. P53_HUMAN
+    sections: dict               # two-letter line code -> list of line bodies
+    sequence: str
+    crc64: str | None            # as declared on the SQ line
+    md5: str | None              # of the sequence
+    content: str                 # record text without the sequence section
+
+
+def iterRawRecords(filePath):
+    """Yield the text of each record (up to its "//" terminator), one at a time."""
+    with open(filePath, encoding="utf-8") as fh:
+        lines = []
+        for line in fh:
+            if line.startswith("//"):
+                if lines:
+                    yield "".join(lines)
+                lines = []
+            else:
+                lines.append(line)
+        if any(line.strip() for line in lines):
+            yield "".join(lines)
+
+
+def parseRecord(text, stopAt=None):
+    """
+    Parse one raw record. content keeps every line except the SQ header and
+    the sequence lines; with stopAt (line prefixes), it is also cut at the
+    first line starting with one of them.
+    """
+    sections, sequence, kept = {}, [], []
+    crc64, stopped = None, False
+    for line in text.strip().splitlines():
+        if line.startswith(" "):
+            sequence.append(line.replace(" ", ""))
+            continue
+        code = line[:2]
+        sections.setdefault(code, []).append(line[5:].rstrip())
+        if code == "SQ":
+            match = CRC64_PATTERN.search(line)
+            crc64 = match.group(1) if match else None
+            continue
+        if stopAt and line.startswith(stopAt):
+            stopped = True
+        if not stopped:
+            kept.append(line)
+
+    accession = sections["AC"][0].split(";")[0].strip() if "AC" in sections else None
+    entryName = sections["ID"][0].split()[0] if "ID" in sections else None
+    sequence = "".join(sequence)
+    return DatRecord(
+        accession=accession or None,
+        entry_name=entryName,
+        sections=sections,
+        sequence=sequence,
+        crc64=crc64,
+        md5=hashlib.md5(sequence.encode("ascii")).hexdigest().upper() if sequence else None,
+        content="\n".join(kept).strip(),
+    )
+
+
+def _listItems(lines):
+    # KW / OC style lines: "Kinase; Transferase {ECO:...}." -> ["kinase", "transferase"]
+    text = EVIDENCE_PATTERN.sub("", " ".join(lines))
+    return [item.strip().rstrip(".").strip().lower() for item in text.split(";") if item.strip().rstrip(".")]
+
+
+def searchTerms(record):
+    """
+    (kind, term) pairs the local Solr executor looks fields up by, lower-cased:
+    keyword, ec, database, xref ("database-identifier"), taxonomy (lineage and
+    scientific name) and fragment ("true" for fragments only).
+    """
+    sections = record.sections
+    terms = set()
+    terms.update(("keyword", keyword) for keyword in _listItems(sections.get("KW", [])))
+    description = " ".join(sections.get("DE", []))
+    terms.update(("ec", ec.rstrip(".")) for ec in EC_PATTERN.findall(description))
+    if re.search(r"Flags:.*Fragment", description):
+        terms.add(("fragment", "true"))
+    for line in sections.get("DR", []):
+        parts = [part.strip() for part in line.split(";")]
+        if len(parts) >= 2:
+            terms.add(("database", parts[0].lower()))
+            terms.add(("xref", f"{parts[0]}-{parts[1]}".lower()))
+    terms.update(("taxonomy", taxon) for taxon in _listItems(sections.get("OC", [])))
+    organism = " ".join(sections.get("OS", [])).split(" (")[0].rstrip(".").strip().lower()
+    if organism:
+        terms.add(("taxonomy", organism))
+    return sorted(terms)
+
+
+def _parseBatch(texts, stopAt):
+    return [parseRecord(text, stopAt) for text in texts]
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def streamRecords(filePath, workers=None, batchSize=BATCH_SIZE, stopAt=None):
+    """
+    Yield DatRecords in file order. Parsing runs in `workers` processes
+    (default: all cores); at most 2 * workers batches are held at once.
+    """
+    workers = workers or os.cpu_count() or 1
+    batches = _batches(iterRawRecords(filePath), batchSize)
+    if workers <= 1:
+        for batch in batches:
+            yield from _parseBatch(batch, stopAt)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(_parseBatch, batch, stopAt))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class RecordWriter:
+    """
+    Write records to flat_files (content database) and flat_files_mapping /
+    sequence_checksums / protein_terms (metadata database) as they stream by, in bulk-load
+    mode (see bulkLoad.py), committing every `commitEvery` records.
+    """
+
+    def __init__(self, contentDbPath, metadataDbPath, commitEvery=10_000):
+        for path in (contentDbPath, metadataDbPath):
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.content = sqlite3.connect(contentDbPath)
+        self.metadata = sqlite3.connect(metadataDbPath)
+        # the content database is written only here; the metadata database is shared
+        applyBulkPragmas(self.content, journal=False)
+        applyBulkPragmas(self.metadata)
+        self.content.execute("""
+            CREATE TABLE IF NOT EXISTS flat_files (
+                file_id TEXT PRIMARY KEY,
+                content TEXT NOT NULL
+            )
+        """)
+        self.metadata.execute("""
+            CREATE TABLE IF NOT EXISTS flat_files_mapping (
+                protein_id TEXT,
+                file_id INTEGER PRIMARY KEY,
+                FOREIGN KEY (file_id) REFERENCES flat_files(file_id)
+            )
+        """)
+        self.metadata.execute("""
+            CREATE TABLE IF NOT EXISTS sequence_checksums (
+                protein_id TEXT PRIMARY KEY,
+                file_id INTEGER,
+                length INTEGER,
+                crc64 TEXT,
+                md5 TEXT
+            )
+        """)
+        self.metadata.execute("""
+            CREATE TABLE IF NOT EXISTS protein_terms (
+                kind TEXT,
+                term TEXT,
+                protein_id TEXT,
+                PRIMARY KEY (kind, term, protein_id)
+            ) WITHOUT ROWID
+        """)
+        self.commitEvery = commitEvery
+        self.count = 0
+        self._contentRows, self._mappingRows, self._checksumRows, self._termRows = [], [], [], []
+
+    def add(self, fileId, record):
+        self._contentRows.append((fileId, record.content))
+        if record.accession:
+            self._mappingRows.append((record.accession, fileId))
+            self._checksumRows.append((record.accession, fileId, len(record.sequence), record.crc64, record.md5))
+            self._termRows.extend((kind, term, record.accession) for kind, term in searchTerms(record))
+        else:
+            print(f"No protein ID found for file_id {fileId}")
+        self.count += 1
+        if len(self._contentRows) >= self.commitEvery:
+            self.flush()
+
+    def flush(self):
+        insertMany(self.content, "INSERT OR IGNORE INTO flat_files (file_id, content) VALUES (?, ?)", self._contentRows)
+        insertMany(
+            self.metadata, "INSERT OR IGNORE INTO flat_files_mapping (protein_id, file_id) VALUES (?, ?)", self._mappingRows
+        )
+        insertMany(self.metadata, "INSERT OR IGNORE INTO sequence_checksums VALUES (?, ?, ?, ?, ?)", self._checksumRows)
+        insertMany(self.metadata, "INSERT OR IGNORE INTO protein_terms VALUES (?, ?, ?)", self._termRows)
+        self.content.commit()
+        self.metadata.commit()
+        self._contentRows, self._mappingRows, self._checksumRows, self._termRows = [], [], [], []
+        print(f"  • Stored {self.count} records…")
+
+    def close(self):
+        self.flush()
+        createIndexes(self.metadata, "flat_files_mapping")
+        createIndexes(self.metadata, "sequence_checksums")
+        self.metadata.commit()
+        self.content.close()
+        self.metadata.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def writeFlatFileTables(
+    filePath="backend/asset/uniprot_sprot.dat",
+    contentDbPath="backend/asset/protein_content.db",
+    metadataDbPath="backend/asset/protein_index2.db",
+    workers=None,
+):
+    with RecordWriter(contentDbPath, metadataDbPath) as writer:
+        for fileId, record in enumerate(streamRecords(filePath, workers)):
+            writer.add(fileId, record)
+    print(f"Wrote {writer.count} records to {contentDbPath} and their mapping to {metadataDbPath}.")
+
+
+if __name__ == "__main__":
+    writeFlatFileTables(*sys.argv[1:2])
@@ -204,7 +204,7 @@ export default function LLMQuery() {
   
     setLoading(true);
     try {
-      const { answer: llmAnswer, proteinIds } = await queryRAG({
+      const { answer: llmAnswer, proteinIds, proteinInfo: inlineInfo } = await queryRAG({
         model:       llmType,
         apiKey,
         question,
@@ -217,7 +217,7 @@ export default function LLMQuery() {
 
       setResults(proteinIds);
 
-      const detailed = await fetchRAGProteinInfo(proteinIds);
+      const detailed = inlineInfo ?? await fetchRAGProteinInfo(proteinIds);
       setProteinInfo(detailed);
     } catch (e) {
       setError(e.response?.data || e.message || 'Unknown error');
@@ -384,14 +384,15 @@ export default function useStudioPageState() {
         sequence: sequenceToSend,
         topK: ragConfig.topK,
         temperature: ragConfig.temperature,
+        conversationId: threadId,
       });
 
       if (requestId !== ragRequestIdRef.current) {
         return;
       }
 
-      let proteinInfo = [];
-      if (ragResponse.proteinIds.length) {
+      let proteinInfo = ragResponse.proteinInfo || [];
+      if (!ragResponse.proteinInfo && ragResponse.proteinIds.length) {
         try {
           proteinInfo = await fetchRAGProteinInfo(ragResponse.proteinIds);
         } catch (_) {
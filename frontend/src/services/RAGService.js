@@ -7,14 +7,17 @@ export async function queryRAG({
   chatHistory,
   sequence,
   topK,
-  temperature = null
+  temperature = null,
+  conversationId = null,
+  includeMetadata = true
 }) {
   const payload = {
     model,
     api_key: apiKey,
     question,
     sequence,
-    top_k: topK
+    top_k: topK,
+    include_metadata: includeMetadata
   };
 
   if (chatHistory?.length) {
@@ -25,11 +28,16 @@ export async function queryRAG({
     payload.temperature = temperature;
   }
 
+  if (conversationId) {
+    payload.conversation_id = conversationId;
+  }
+
   const { data } = await axios.post('/rag_order', payload);
   return {
     answer: data.answer,
     proteinIds: data.protein_ids,
     suggestedFollowUps: data.suggested_followups || [],
+    proteinInfo: data.protein_info ?? null,
   };
 }
 
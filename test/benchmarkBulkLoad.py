@@ -0,0 +1,101 @@
+"""
+Benchmark the SQLite build steps: row-by-row inserts vs config/bulkLoad.py.
+
+Loads the same synthetic protein_go_mapping-shaped rows (accession, GO id,
+evidence code) into a fresh on-disk database three ways:
+
+  per-row commit   execute() + commit() per row, as process_obo_file did
+                   (timed on --per-commit-rows rows and extrapolated)
+  row-by-row       execute() per row in one transaction, default journal and
+                   sync, indexes created before loading (the old GOA/id_map path)
+  bulk load        bulkLoad() + insertMany(), indexes created after loading
+
+    python test/benchmarkBulkLoad.py --rows 2000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config"))
+from bulkLoad import bulkLoad, createIndexes, insertMany  # noqa: E402
+
+TABLE_SQL = """
+CREATE TABLE protein_go_mapping (protein_id TEXT, go_id TEXT, evidence_code TEXT, PRIMARY KEY (protein_id, go_id))
+"""
+INSERT_SQL = "INSERT OR IGNORE INTO protein_go_mapping (protein_id, go_id, evidence_code) VALUES (?, ?, ?)"
+EVIDENCE = ["EXP", "IDA", "IPI", "IMP", "IGI", "IEP", "ISS", "TAS", "NAS", "IC"]
+
+
+def syntheticRows(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield (
+            f"{rng.choice('OPQ')}{rng.randrange(100000):05d}",
+            f"GO:{rng.randrange(50000):07d}",
+            rng.choice(EVIDENCE),
+        )
+
+
+def perRowCommit(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(TABLE_SQL)
+    createIndexes(conn, "protein_go_mapping")
+    for row in rows:
+        conn.execute(INSERT_SQL, row)
+        conn.commit()
+    conn.close()
+
+
+def rowByRow(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(TABLE_SQL)
+    createIndexes(conn, "protein_go_mapping")
+    for row in rows:
+        conn.execute(INSERT_SQL, row)
+    conn.commit()
+    conn.close()
+
+
+def bulk(path, rows):
+    with bulkLoad(path) as conn:
+        conn.execute(TABLE_SQL)
+        insertMany(conn, INSERT_SQL, rows)
+        createIndexes(conn, "protein_go_mapping")
+
+
+def timed(label, loader, path, rowCount):
+    start = time.perf_counter()
+    loader(path, syntheticRows(rowCount))
+    seconds = time.perf_counter() - start
+    stored = sqlite3.connect(path).execute("SELECT COUNT(*) FROM protein_go_mapping").fetchone()[0]
+    return {"label": label, "rows": rowCount, "stored": stored, "seconds": seconds, "rate": rowCount / seconds}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--per-commit-rows", type=int, default=2_000)
+    parser.add_argument("--dir", help="directory for the scratch databases (default: system temp)")
+    args = parser.parse_args()
+
+    workDir = tempfile.mkdtemp(prefix="bulk-bench-", dir=args.dir)
+    results = [
+        timed("per-row commit", perRowCommit, os.path.join(workDir, "commit.db"), args.per_commit_rows),
+        timed("row-by-row", rowByRow, os.path.join(workDir, "rows.db"), args.rows),
+        timed("bulk load", bulk, os.path.join(workDir, "bulk.db"), args.rows),
+    ]
+    bulkRate = results[-1]["rate"]
+
+    print(f"\n{'':16}{'rows':>12}{'seconds':>10}{'rows/s':>12}{f'est. {args.rows} rows':>22}{'bulk speedup':>14}")
+    for result in results:
+        estimate = args.rows / result["rate"]
+        print(f"{result['label']:16}{result['rows']:>12}{result['seconds']:>10.2f}{result['rate']:>12.0f}"
+              f"{estimate:>20.1f} s{bulkRate / result['rate']:>13.1f}x")
+
+    for name in os.listdir(workDir):
+        os.remove(os.path.join(workDir, name))
+    os.rmdir(workDir)
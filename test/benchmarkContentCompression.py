@@ -0,0 +1,116 @@
+"""
+Benchmark plain vs zstd-dictionary-compressed flat_files content.
+
+Copies a content database, compresses the copy with config/compressFlatFiles.py
+and compares the two on
+  - database file size,
+  - fetch latency of random batches through flat_text() (warm OS cache),
+  - simulated cache hit rate (sim_hit_rate): a synthetic Zipf-distributed
+    stream of record reads replayed against a modelled LRU cache of
+    --cache-mib, sized in stored bytes. It is not measured on SQLite's page
+    cache or the OS page cache; it only shows how many more records fit.
+
+    python test/benchmarkContentCompression.py --db backend/asset/protein_content.db
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "config"))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+from compressFlatFiles import compressFlatFiles  # noqa: E402
+from src.flatFileCodec import registerDecoder  # noqa: E402
+
+
+def fetchLatencies(dbPath, fileIds, batches, batchSize):
+    conn = sqlite3.connect(f"file:{dbPath}?mode=ro", uri=True)
+    registerDecoder(conn)
+    rng = random.Random(0)
+    timings = []
+    for _ in range(batches):
+        batch = rng.sample(fileIds, min(batchSize, len(fileIds)))
+        start = time.perf_counter()
+        conn.execute(
+            f"SELECT flat_text(content) FROM flat_files WHERE file_id IN ({','.join('?' * len(batch))})", batch
+        ).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    timings.sort()
+    return {
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[int(len(timings) * 0.95)],
+    }
+
+
+def storedSizes(dbPath):
+    conn = sqlite3.connect(f"file:{dbPath}?mode=ro", uri=True)
+    sizes = dict(conn.execute("SELECT file_id, length(CAST(content AS BLOB)) FROM flat_files"))
+    conn.close()
+    return sizes
+
+
+def lruHitRate(sizes, stream, capacityBytes):
+    cache, used, hits = OrderedDict(), 0, 0
+    for fileId in stream:
+        if fileId in cache:
+            hits += 1
+            cache.move_to_end(fileId)
+            continue
+        cache[fileId] = sizes[fileId]
+        used += sizes[fileId]
+        while used > capacityBytes:
+            _, size = cache.popitem(last=False)
+            used -= size
+    return hits / len(stream)
+
+
+def zipfStream(fileIds, length, exponent):
+    rng = random.Random(1)
+    ranked = fileIds[:]
+    rng.shuffle(ranked)
+    weights = [1 / (rank ** exponent) for rank in range(1, len(ranked) + 1)]
+    return rng.choices(ranked, weights=weights, k=length)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="uncompressed content database")
+    parser.add_argument("--batches", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--cache-mib", type=float, default=64)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--stream", type=int, default=200000)
+    args = parser.parse_args()
+
+    workDir = tempfile.mkdtemp(prefix="content-bench-")
+    packedPath = os.path.join(workDir, "protein_content.zstd.db")
+    shutil.copy(args.db, packedPath)
+    compressFlatFiles(packedPath)
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    fileIds = [row[0] for row in conn.execute("SELECT file_id FROM flat_files")]
+    conn.close()
+    stream = zipfStream(fileIds, args.stream, args.zipf)
+
+    print(f"\n{'':14}{'plain':>14}{'zstd+dict':>14}")
+    results = {}
+    for label, path in (("plain", args.db), ("zstd+dict", packedPath)):
+        results[label] = {
+            "size_mb": os.path.getsize(path) / 1e6,
+            **fetchLatencies(path, fileIds, args.batches, args.batch_size),
+            "sim_hit_rate": lruHitRate(storedSizes(path), stream, args.cache_mib * 1024 * 1024),
+        }
+    for metric in ("size_mb", "mean_ms", "p50_ms", "p95_ms", "sim_hit_rate"):
+        print(f"{metric:14}{results['plain'][metric]:>14.3f}{results['zstd+dict'][metric]:>14.3f}")
+    print("\nsim_hit_rate is simulated (synthetic Zipf stream, modelled LRU cache), not measured.")
+
+    shutil.rmtree(workDir)
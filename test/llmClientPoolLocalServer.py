@@ -0,0 +1,147 @@
+"""
+Checks for the pooled LLM clients of backend/main.py (build_llm) against a
+local stand-in for the OpenAI chat completions API (http.server on localhost,
+HTTP/1.1 keep-alive): one TCP connection across repeated build_llm + invoke
+calls, and idle expiry (LLM_POOL_IDLE_SECONDS) and LRU eviction
+(LLM_POOL_SIZE) closing the dropped clients and building new ones.
+
+    python test/llmClientPoolLocalServer.py
+
+Needs the backend requirements (main.py is imported). Exits non-zero if a
+check fails.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+MODEL = "gpt-4o-mini"
+API_KEY = "local-test-key"
+CALLS = 10
+
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, as api.openai.com
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        # one handler instance per accepted TCP connection
+        super().setup()
+        with ChatCompletionsHandler.lock:
+            ChatCompletionsHandler.connections += 1
+
+    def do_POST(self):
+        # read the request body, or the next request on this connection is garbled
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "id": "chatcmpl-local",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": MODEL,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+# read by ChatOpenAI / the openai client when no base_url is passed
+os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+os.chdir(BACKEND)
+import main  # noqa: E402
+
+
+def _reset():
+    for llm, _ in list(main._llm_pool.values()) + main._llm_retired:
+        main._close_llm(llm)
+    main._llm_pool.clear()
+    main._llm_retired.clear()
+
+
+def _closed(llm):
+    return llm.http_client.is_closed and llm.http_async_client.is_closed
+
+
+def checkSingleConnection():
+    _reset()
+    before = ChatCompletionsHandler.connections
+    first = main.build_llm(MODEL, API_KEY, 0)
+    for _ in range(CALLS):
+        llm = main.build_llm(MODEL, API_KEY, 0)
+        assert llm is first, "build_llm built a new client for the same model, key and temperature"
+        assert llm.invoke("ping").content == "ok"
+    opened = ChatCompletionsHandler.connections - before
+    assert opened == 1, f"{opened} TCP connections for {CALLS} build_llm + invoke calls"
+    print(f"ok    {CALLS} build_llm + invoke calls over {opened} TCP connection")
+
+
+def checkIdleExpiry():
+    _reset()
+    saved = main.LLM_POOL_IDLE_SECONDS, main.LLM_POOL_CLOSE_GRACE_SECONDS
+    main.LLM_POOL_IDLE_SECONDS, main.LLM_POOL_CLOSE_GRACE_SECONDS = 0.2, 0
+    try:
+        first = main.build_llm(MODEL, API_KEY, 0)
+        first.invoke("ping")
+        time.sleep(0.3)
+        before = ChatCompletionsHandler.connections
+        second = main.build_llm(MODEL, API_KEY, 0)
+        assert second is not first, "an idle client was not replaced"
+        assert _closed(first), "the expired client's HTTP clients were not closed"
+        assert second.invoke("ping").content == "ok"
+        assert ChatCompletionsHandler.connections - before == 1, "the replacement did not open its own connection"
+    finally:
+        main.LLM_POOL_IDLE_SECONDS, main.LLM_POOL_CLOSE_GRACE_SECONDS = saved
+    print("ok    idle client closed and replaced")
+
+
+def checkLruEviction():
+    _reset()
+    saved = main.LLM_POOL_SIZE, main.LLM_POOL_CLOSE_GRACE_SECONDS
+    main.LLM_POOL_SIZE, main.LLM_POOL_CLOSE_GRACE_SECONDS = 2, 0
+    try:
+        # the temperature is part of the pool key
+        oldest, middle = main.build_llm(MODEL, API_KEY, 0.0), main.build_llm(MODEL, API_KEY, 0.1)
+        newest = main.build_llm(MODEL, API_KEY, 0.2)
+        assert len(main._llm_pool) == 2, f"{len(main._llm_pool)} clients pooled with LLM_POOL_SIZE = 2"
+        assert _closed(oldest), "the least recently used client was not closed"
+        assert not _closed(middle) and not _closed(newest), "a pooled client was closed"
+        rebuilt = main.build_llm(MODEL, API_KEY, 0.0)
+        assert rebuilt is not oldest, "an evicted client was handed out again"
+        assert rebuilt.invoke("ping").content == "ok"
+        assert _closed(middle), "the next least recently used client was not closed"
+    finally:
+        main.LLM_POOL_SIZE, main.LLM_POOL_CLOSE_GRACE_SECONDS = saved
+    print("ok    least recently used client closed and replaced")
+
+
+CHECKS = [checkSingleConnection, checkIdleExpiry, checkLruEviction]
+
+
+if __name__ == "__main__":
+    failures = 0
+    try:
+        for check in CHECKS:
+            try:
+                check()
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL  {check.__name__}: {e}")
+    finally:
+        _reset()
+        server.shutdown()
+    sys.exit(1 if failures else 0)
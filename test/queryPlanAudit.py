@@ -0,0 +1,176 @@
+"""
+EXPLAIN QUERY PLAN audit for the SQL the backend runs against protein_index2.db.
+
+Builds a small fixture database with the schema of the config/ build scripts
+plus the indexes of config/addIndexes.py, collects the statements from the
+backend itself (the *_SQL constants of AUDITED_MODULES, read from their source,
+and the local Solr executor's SQL for LOCAL_SOLR_QUERIES), runs EXPLAIN QUERY
+PLAN for each and exits non-zero if any statement not listed in ALLOWED_SCANS
+scans a table instead of searching an index.
+
+    python test/queryPlanAudit.py                      # fixture database
+    python test/queryPlanAudit.py --db backend/asset/protein_index2.db
+"""
+import argparse
+import ast
+import os
+import sqlite3
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "backend", "src")
+sys.path.insert(0, os.path.join(ROOT, "config"))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+from addIndexes import INDEXES  # noqa: E402
+from src.flatFileCodec import registerDecoder  # noqa: E402
+from src.localSolrExecutor import compileLocalSolrQuery  # noqa: E402
+from src.sqlitePool import fullScans  # noqa: E402
+
+# backend modules whose module-level *_SQL constants run against protein_index2.db;
+# "{}" in a constant stands for an IN (...) placeholder list
+AUDITED_MODULES = [
+    "flatFileContentCache",
+    "proteinRetriverFromFTS",
+    "relevantGOIdFinder",
+    "proteinMetadataStore",
+    "promptSchemaCache",
+]
+# statements that read a whole table by design: once at startup, or once per process
+ALLOWED_SCANS = {
+    "proteinMetadataStore.PROTEIN_INFO_SQL": {"protein_info"},
+    "proteinMetadataStore.ID_MAP_SQL": {"id_map"},
+    "promptSchemaCache.SEARCH_FIELDS_SQL": {"search_fields"},
+    "promptSchemaCache.RESULT_FIELDS_SQL": {"result_fields"},
+    "relevantGOIdFinder.DISTINCT_PROTEIN_COUNT_SQL": {"protein_go_mapping"},
+}
+# one query per field the local Solr executor answers from an index (queries
+# that would scan, e.g. go:"ATP binding", are rejected at run time and go remote)
+LOCAL_SOLR_QUERIES = [
+    "accession:P04637",
+    "id:P53_HUMAN",
+    "gene:TP53",
+    "organism_name:\"Homo sapiens\"",
+    "organism_id:9606",
+    "taxonomy_name:mammalia",
+    "keyword:kinase",
+    "keyword:kin*",
+    "ec:3.6.1.*",
+    "xref:pdb-1a1u",
+    "database:embl",
+    "fragment:true",
+    "length:[100 TO 200]",
+    "go:GO:0005524",
+    "kinase",
+    "gene:TP53 AND reviewed:true AND NOT fragment:true",
+]
+IN_LIST_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE search_fields (id TEXT PRIMARY KEY, label TEXT, itemType TEXT, term TEXT, dataType TEXT,
+                            fieldType TEXT, example TEXT, regex TEXT);
+CREATE TABLE result_fields (id TEXT PRIMARY KEY, groupName TEXT, isDatabaseGroup BOOLEAN, label TEXT,
+                            name TEXT, sortField TEXT);
+CREATE TABLE protein_info (protein_id TEXT PRIMARY KEY, protein_name TEXT, type TEXT, os TEXT, ox TEXT,
+                           gn TEXT, pe TEXT, sv TEXT);
+CREATE TABLE id_map (index_id INTEGER PRIMARY KEY, protein_id TEXT);
+CREATE TABLE flat_files (file_id TEXT PRIMARY KEY, content TEXT NOT NULL);
+CREATE TABLE flat_files_mapping (protein_id TEXT, file_id INTEGER PRIMARY KEY);
+CREATE TABLE sequence_checksums (protein_id TEXT PRIMARY KEY, file_id INTEGER, length INTEGER, crc64 TEXT, md5 TEXT);
+CREATE TABLE protein_terms (kind TEXT, term TEXT, protein_id TEXT, PRIMARY KEY (kind, term, protein_id)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE flat_files_fts USING fts5(content, tokenize = 'trigram');
+CREATE TABLE protein_go_mapping (protein_id TEXT, go_id TEXT, evidence_code TEXT, PRIMARY KEY (protein_id, go_id));
+CREATE TABLE go_info (go_id TEXT PRIMARY KEY, go_name TEXT, namespace TEXT, alt_id TEXT, def TEXT, comment TEXT,
+                      synonym TEXT, is_obsolete TEXT, replaced_by TEXT, consider TEXT, is_a TEXT);
+CREATE TABLE background_distribution_count (go_id TEXT PRIMARY KEY, background_distribution INTEGER);
+"""
+
+
+def _moduleConstants(module):
+    """Module-level NAME_SQL = "..." assignments (string literals and + of them), without importing the module."""
+    with open(os.path.join(SRC, f"{module}.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    constants = {}
+
+    def evaluate(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in constants:
+            return constants[node.id]
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left, right = evaluate(node.left), evaluate(node.right)
+            if left is not None and right is not None:
+                return left + right
+        return None
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name.endswith("_SQL"):
+                value = evaluate(node.value)
+                if value is None:
+                    raise ValueError(f"{module}.{name} is not a string literal")
+                constants[name] = value
+    return constants
+
+
+def collectStatements():
+    """(name, sql, params) for every audited statement."""
+    statements = []
+    for module in AUDITED_MODULES:
+        for name, sql in _moduleConstants(module).items():
+            sql = sql.replace("{}", ",".join("?" * IN_LIST_LENGTH))
+            statements.append((f"{module}.{name}", sql, [None] * sql.count("?")))
+    for query in LOCAL_SOLR_QUERIES:
+        sql, params = compileLocalSolrQuery(query, 10)
+        statements.append((f"localSolrExecutor: {query}", sql, params))
+    return statements
+
+
+def buildFixture():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    for name, table, columns in INDEXES:
+        conn.execute(f"CREATE INDEX {name} ON {table}({', '.join(columns)})")
+    conn.executemany("INSERT INTO protein_info (protein_id, gn) VALUES (?, ?)", [("P1", "A"), ("P2", "B"), ("P3", "C")])
+    conn.executemany("INSERT INTO flat_files VALUES (?, ?)", [(0, "AC   P1;"), (1, "AC   P2;"), (2, "AC   P3;")])
+    conn.executemany("INSERT INTO flat_files_mapping VALUES (?, ?)", [("P1", 0), ("P2", 1), ("P3", 2)])
+    conn.executemany("INSERT INTO id_map VALUES (?, ?)", [(0, "P1"), (1, "P2"), (2, "P3")])
+    conn.executemany("INSERT INTO protein_go_mapping VALUES (?, ?, ?)", [("P1", "GO:0005524", "EXP"), ("P2", "GO:0005524", "IDA")])
+    conn.execute("INSERT INTO go_info (go_id, go_name) VALUES ('GO:0005524', 'ATP binding')")
+    conn.execute("INSERT INTO background_distribution_count VALUES ('GO:0005524', 2)")
+    conn.commit()
+    return conn
+
+
+def audit(conn, statements):
+    failures = 0
+    for name, sql, params in statements:
+        try:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            scans = fullScans(conn, sql, params)
+        except sqlite3.Error as e:
+            print(f"FAIL  {name}: {e}")
+            failures += 1
+            continue
+        unexpected = [table for table in scans if table not in ALLOWED_SCANS.get(name, ())]
+        status = "FAIL" if unexpected else "ok"
+        print(f"{status:5} {name}")
+        for step in plan:
+            print(f"        {step}")
+        if unexpected:
+            failures += 1
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="audit an existing database instead of the fixture")
+    args = parser.parse_args()
+
+    statements = collectStatements()
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True) if args.db else buildFixture()
+    registerDecoder(conn)
+    failures = audit(conn, statements)
+    conn.close()
+    print(f"\n{len(statements) - failures}/{len(statements)} statements use their indexes.")
+    sys.exit(1 if failures else 0)
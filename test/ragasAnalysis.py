@@ -6,10 +6,19 @@ from datasets import Dataset
 from ragas.evaluation import evaluate
 from ragas.metrics import faithfulness, answer_relevancy
 import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from src.flatFileCodec import registerDecoder  # noqa: E402
 
 os.environ["OPENAI_API_KEY"] = ""
 
 conn = sqlite3.connect("backend/asset/protein_index2.db")
+if os.path.exists("backend/asset/protein_content.db"):
+    # flat_files is split off into the content database (config/splitDatabase.py)
+    conn.execute("ATTACH DATABASE ? AS content", ("backend/asset/protein_content.db",))
+# flat_text() decodes rows compressed by config/compressFlatFiles.py
+registerDecoder(conn)
 
 def process_content(content):
     cleaned_content = re.sub(r'^[A-Z]{2}\s+-\S+\t', '', content, flags=re.MULTILINE)
@@ -29,7 +38,7 @@ def ragasAnalysis(excel_path, output_path):
 
         for protein_id in protein_ids:
             file_id_rows = conn.execute("""
-                select content from flat_files where file_id in (select file_id from flat_files_mapping where protein_id = ?)
+                select flat_text(content) from flat_files where file_id in (select file_id from flat_files_mapping where protein_id = ?)
             """, (protein_id,)).fetchall()
 
             contexts = []
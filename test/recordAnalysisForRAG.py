@@ -1,33 +1,17 @@
-import re
+import os
+import sys
 import pandas as pd
 import numpy as np
 
-def load_records(filepath, delimiterPattern=r"^//[ \t]*\r?\n(?=ID)"):
-    print(f"Loading records from {filepath}")
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    splitter = re.compile(delimiterPattern, flags=re.MULTILINE)
-    raw_records = [chunk.strip() for chunk in splitter.split(content) if chunk.strip()]
-    print(f"Loaded {len(raw_records)} records")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config"))
+from uniprotDatReader import streamRecords  # noqa: E402
 
-    cleaned_records = []
-    for record in raw_records:
-        lines = record.splitlines()
-        cleaned_lines = []
-        in_sequence = False
-        for line in lines:
-            if line.startswith('SQ') or line.startswith(' ') or line.startswith("CC"):
-                in_sequence = True
-                continue
-            if in_sequence:
-                continue
-            cleaned_lines.append(line)
-        cleaned_record = '\n'.join(cleaned_lines).strip()
-        if cleaned_record:
-            cleaned_records.append(cleaned_record)
-
-    return cleaned_records
+def load_records(filepath):
+    """Record texts up to their first CC line, streamed and cleaned in worker processes."""
+    print(f"Loading records from {filepath}")
+    for record in streamRecords(filepath, stopAt=("CC",)):
+        if record.content:
+            yield record.content
 
 def calculateRecordLengths(records):
     return [len(record) for record in records]
@@ -82,5 +66,6 @@ def processUniprotFile(filePath):
     recordLengths = calculateRecordLengths(records)
     printFormattedTable(recordLengths)
 
-filePath = 'backend/asset/uniprot_sprot.dat'
-processUniprotFile(filePath)
+if __name__ == "__main__":
+    filePath = 'backend/asset/uniprot_sprot.dat'
+    processUniprotFile(filePath)
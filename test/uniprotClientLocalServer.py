@@ -0,0 +1,134 @@
+"""
+Checks for backend/src/uniprotClient.py against a local stand-in for
+rest.uniprot.org (http.server on localhost, HTTP/1.1 keep-alive): connection
+reuse across searches, and cursor pagination over Link: rel="next" headers.
+
+    python test/uniprotClientLocalServer.py
+
+Exits non-zero if a check fails.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from src import uniprotClient  # noqa: E402
+
+SEARCHES = 20
+PAGES = 3
+PAGE_SIZE = 2
+PAGE_DELAY = 0.2     # seconds the stand-in takes per page, and the caller spends on one
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, as rest.uniprot.org
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        # one handler instance per accepted TCP connection
+        super().setup()
+        with StandInHandler.lock:
+            StandInHandler.connections += 1
+
+    def do_GET(self):
+        body = json.dumps({"results": [{"primaryAccession": "P00001"}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PagedHandler(BaseHTTPRequestHandler):
+    """Serves PAGES pages of PAGE_SIZE entries, linked by Link: rel="next" cursors."""
+    protocol_version = "HTTP/1.1"
+    requests = []        # (page, arrival time)
+    lock = threading.Lock()
+
+    def do_GET(self):
+        page = int(parse_qs(urlparse(self.path).query).get("cursor", ["0"])[0])
+        with PagedHandler.lock:
+            PagedHandler.requests.append((page, time.perf_counter()))
+        time.sleep(PAGE_DELAY)
+        results = [{"primaryAccession": f"P{page * PAGE_SIZE + i:05d}"} for i in range(PAGE_SIZE)]
+        body = json.dumps({"results": results}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if page + 1 < PAGES:
+            host, port = self.server.server_address
+            self.send_header("Link", f'<http://{host}:{port}/uniprotkb/search?cursor={page + 1}>; rel="next"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def startServer(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/uniprotkb/search"
+
+
+def checkSingleConnection():
+    server, url = startServer(StandInHandler)
+    try:
+        for _ in range(SEARCHES):
+            result = uniprotClient.search_uniprot("gene:TP53", 1, base_url=url)
+            assert result["results"][0]["primaryAccession"] == "P00001", result
+        assert StandInHandler.connections == 1, f"{StandInHandler.connections} TCP connections for {SEARCHES} searches"
+    finally:
+        server.shutdown()
+    print(f"ok    {SEARCHES} searches over {StandInHandler.connections} TCP connection")
+
+
+def checkPagination():
+    server, url = startServer(PagedHandler)
+    try:
+        PagedHandler.requests = []
+        entries = uniprotClient.search_uniprot("gene:TP53", PAGES * PAGE_SIZE, base_url=url)["results"]
+        expected = [f"P{i:05d}" for i in range(PAGES * PAGE_SIZE)]
+        assert [e["primaryAccession"] for e in entries] == expected, entries
+
+        # limit cuts the last page short and stops following the cursor
+        PagedHandler.requests = []
+        entries = uniprotClient.search_uniprot("gene:TP53", PAGE_SIZE + 1, prefetch=True, base_url=url)["results"]
+        assert [e["primaryAccession"] for e in entries] == expected[:PAGE_SIZE + 1], entries
+        assert [page for page, _ in PagedHandler.requests] == [0, 1], PagedHandler.requests
+
+        # with prefetch, page n + 1 is requested while the caller still works on page n
+        PagedHandler.requests = []
+        consumed = []
+        for page in uniprotClient.iter_uniprot_pages("gene:TP53", PAGES * PAGE_SIZE, prefetch=True, base_url=url):
+            time.sleep(PAGE_DELAY)
+            consumed.append(time.perf_counter())
+        arrivals = [arrival for _, arrival in sorted(PagedHandler.requests)]
+        assert len(arrivals) == PAGES, PagedHandler.requests
+        for page in range(PAGES - 1):
+            assert arrivals[page + 1] < consumed[page], f"page {page + 1} was only requested after page {page} was consumed"
+    finally:
+        server.shutdown()
+    print(f"ok    {PAGES} linked pages in order, limit truncation, prefetch overlap")
+
+
+CHECKS = [checkSingleConnection, checkPagination]
+
+
+if __name__ == "__main__":
+    failures = 0
+    for check in CHECKS:
+        try:
+            check()
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL  {check.__name__}: {e}")
+    sys.exit(1 if failures else 0)